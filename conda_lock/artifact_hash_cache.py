@@ -0,0 +1,131 @@
+"""Persistent cache of the sha256 hashes of pip artifacts.
+
+When a pip index does not publish the hash of a file, Poetry downloads the whole
+file in `HTTPRepository.calculate_sha256` to hash it. Against such indexes every
+lock downloads every candidate wheel again. This module remembers the computed
+hashes in the user cache directory, keyed on the URL of the artifact and on the
+`ETag`/`Last-Modified` and `Content-Length` reported by a `HEAD` request, so that
+an artifact is only downloaded again when it has changed on the server.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from collections.abc import Callable
+from pathlib import Path
+
+import requests
+
+from filelock import FileLock, Timeout
+from platformdirs import user_cache_path
+
+from conda_lock.interfaces.vendored_poetry import Link
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_HASH_CACHE_MAX_ENTRIES = 50_000
+"""When the cache holds more entries, the least recently used ones are removed."""
+
+
+def _default_cache_dir() -> Path:
+    return user_cache_path("conda-lock", appauthor=False) / "cache" / "artifact-hashes"
+
+
+def _artifact_validator(head: Callable[..., requests.Response], url: str) -> str | None:
+    """Return a string that changes whenever the artifact at `url` changes."""
+    try:
+        res = head(url, allow_redirects=True)
+    except requests.RequestException as e:
+        logger.debug(f"Unable to determine the state of {url}: {e}")
+        return None
+    validator = res.headers.get("ETag") or res.headers.get("Last-Modified")
+    size = res.headers.get("Content-Length")
+    if validator is None or size is None:
+        return None
+    return f"{validator} {size}"
+
+
+def _cache_key(link: Link, validator: str) -> str:
+    # The hashes published for the link are used to verify the download, so they
+    # influence the result of the computation.
+    key_data = [link.url_without_fragment, validator, sorted(link.hashes.items())]
+    return hashlib.sha256(json.dumps(key_data).encode()).hexdigest()
+
+
+def cached_calculate_sha256(
+    calculate_sha256: Callable[[Link], str | None],
+    link: Link,
+    *,
+    head: Callable[..., requests.Response],
+    cache_dir: Path | None = None,
+    max_entries: int = ARTIFACT_HASH_CACHE_MAX_ENTRIES,
+) -> str | None:
+    """Like `calculate_sha256(link)`, but reuse the result of previous runs.
+
+    `head` performs the `HEAD` request, usually with the session of the repository
+    so that the same credentials are used. If the server reports neither `ETag` nor
+    `Last-Modified`, the hash is computed without caching.
+    """
+    validator = _artifact_validator(head, link.url)
+    if validator is None:
+        return calculate_sha256(link)
+
+    cache = cache_dir or _default_cache_dir()
+    path = cache / _cache_key(link, validator)
+    try:
+        cached_hash = path.read_text().strip()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.debug(f"Ignoring unreadable artifact hash cache entry {path}: {e}")
+    else:
+        if cached_hash.startswith("sha256:"):
+            logger.debug(f"Using cached hash of {link.filename}")
+            try:
+                # Keep track of recently used entries for eviction.
+                path.touch()
+            except FileNotFoundError:
+                pass
+            return cached_hash
+
+    file_hash = calculate_sha256(link)
+    if file_hash is not None:
+        try:
+            cache.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(
+                f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_text(file_hash)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Failed to cache the hash of {link.filename}: {e}")
+        else:
+            evict_artifact_hash_cache(cache, max_entries=max_entries)
+    return file_hash
+
+
+def evict_artifact_hash_cache(cache: Path, *, max_entries: int) -> None:
+    """Remove the least recently used entries until at most `max_entries` remain."""
+    try:
+        with FileLock(str(cache / ".evict.lock"), timeout=0):
+            entries = []
+            for path in cache.iterdir():
+                if path.name.startswith("."):
+                    continue
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            for _, path in sorted(entries)[: max(len(entries) - max_entries, 0)]:
+                try:
+                    path.unlink()
+                    logger.debug(f"Evicted artifact hash cache entry {path}")
+                except FileNotFoundError:
+                    pass
+    except Timeout:
+        # Another process is already evicting.
+        pass
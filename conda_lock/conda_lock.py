@@ -14,7 +14,8 @@ import subprocess
 import sys
 import tempfile
 
-from collections.abc import Iterator, Sequence, Set
+from collections.abc import Callable, Iterator, Sequence, Set
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from functools import partial
 from importlib.metadata import distribution
@@ -38,7 +39,7 @@ from conda_lock.common import (
     warn,
     write_file,
 )
-from conda_lock.conda_solver import solve_conda
+from conda_lock.conda_solver import SolverBackend, solve_conda
 from conda_lock.content_hash import (
     backwards_compatible_content_hashes,
     compute_content_hashes,
@@ -55,11 +56,15 @@ from conda_lock.invoke_conda import (
     _invoke_conda,
     determine_conda_executable,
     is_micromamba,
+    use_persistent_pkgs_dir,
 )
 from conda_lock.lockfile import (
+    parse_and_cache_conda_lock_file,
     parse_conda_lock_file,
     write_conda_lock_file,
 )
+from conda_lock.lockfile.decode import load_yaml
+from conda_lock.lockfile.parsed_cache import load_parsed_lockfile, read_lockfile
 from conda_lock.lockfile.v2prelim.models import (
     GitMeta,
     InputMeta,
@@ -74,7 +79,9 @@ from conda_lock.lookup import DEFAULT_MAPPING_URL
 from conda_lock.models.channel import Channel
 from conda_lock.models.lock_spec import LockSpecification
 from conda_lock.models.pip_repository import PipRepository
-from conda_lock.pypi_solver import solve_pypi
+from conda_lock.pypi_solver import PipRepositoryPools, PipResolutions, solve_pypi
+from conda_lock.rattler_solver import RattlerSession
+from conda_lock.solve_cache import load_cached_solve, solve_cache_key, store_solve
 from conda_lock.src_parser import make_lock_spec
 from conda_lock.tempdir_manager import temporary_file_with_contents
 from conda_lock.virtual_package import (
@@ -286,6 +293,10 @@ def make_lock_files(  # noqa: C901
     with_cuda: str | None = None,
     strip_auth: bool = False,
     mapping_url: str,
+    jobs: int = 1,
+    solve_cache: bool = False,
+    solver_backend: SolverBackend = "subprocess",
+    incremental_pip: bool = False,
 ) -> None:
     """
     Generate a lock file from the src files provided
@@ -327,6 +338,14 @@ def make_lock_files(  # noqa: C901
         None will pick a default version and warn if cuda packages are installed.
     metadata_yamls:
         YAML or JSON file(s) containing structured metadata to add to metadata section of the lockfile.
+    jobs:
+        Maximum number of platforms to solve concurrently.
+    solve_cache:
+        Reuse solutions from the persistent solve cache and store new ones in it.
+    solver_backend:
+        Whether to solve with `conda` in a subprocess or in-process with rattler.
+    incremental_pip:
+        Only resolve the pip requirements that the previous lockfile does not satisfy.
     """
     # Compute lock specification
     filtered_categories: Set[str] | None = None
@@ -442,6 +461,10 @@ def make_lock_files(  # noqa: C901
                 strip_auth=strip_auth,
                 virtual_package_repo=virtual_package_repo,
                 mapping_url=mapping_url,
+                jobs=jobs,
+                solve_cache=solve_cache,
+                solver_backend=solver_backend,
+                incremental_pip=incremental_pip,
             )
 
             if not original_lock_content:
@@ -775,9 +798,18 @@ def _solve_for_arch(
     update_spec: UpdateSpecification | None = None,
     strip_auth: bool = False,
     mapping_url: str,
+    solver_backend: SolverBackend = "subprocess",
+    incremental_pip: bool = False,
+    pip_resolutions: PipResolutions | None = None,
+    pip_pools: PipRepositoryPools | None = None,
+    rattler_session: RattlerSession | None = None,
 ) -> list[LockedDependency]:
     """
     Solve specification for a single platform
+
+    With `incremental_pip`, the pip requirements that the previous pip solution for
+    the platform still satisfies are not resolved again, as long as no updates were
+    requested and the conda solution is unchanged.
     """
     if update_spec is None:
         update_spec = UpdateSpecification()
@@ -801,6 +833,8 @@ def _solve_for_arch(
         platform=platform,
         channels=channels,
         mapping_url=mapping_url,
+        solver_backend=solver_backend,
+        rattler_session=rattler_session,
     )
 
     if requested_deps_by_name["pip"]:
@@ -818,6 +852,18 @@ def _solve_for_arch(
             # pyright infers the correct type here, but mypy does not.
             platform_virtual_packages = metadata_for_platform.get("packages")  # type: ignore[assignment]
 
+        incremental_locked: dict[str, LockedDependency] | None = None
+        if (
+            incremental_pip
+            and locked_deps_by_name["pip"]
+            and not update_spec.update
+            and {name: dep.version for name, dep in conda_deps.items()}
+            == {name: dep.version for name, dep in locked_deps_by_name["conda"].items()}
+        ):
+            incremental_locked = locked_deps_by_name["pip"]
+        elif incremental_pip:
+            logger.info(f"Resolving all pip requirements for {platform}")
+
         pip_deps = solve_pypi(
             pip_specs=requested_deps_by_name["pip"],
             use_latest=update_spec.update,
@@ -832,6 +878,9 @@ def _solve_for_arch(
             allow_pypi_requests=spec.allow_pypi_requests,
             strip_auth=strip_auth,
             mapping_url=mapping_url,
+            incremental_locked=incremental_locked,
+            pip_resolutions=pip_resolutions,
+            pip_pools=pip_pools,
         )
     else:
         pip_deps = {}
@@ -839,6 +888,93 @@ def _solve_for_arch(
     return list(conda_deps.values()) + list(pip_deps.values())
 
 
+def _solve_for_arch_with_cache(
+    solve_for_platform: Callable[..., list[LockedDependency]],
+    *,
+    platform: str,
+    conda: PathLike,
+    spec: LockSpecification,
+    content_hashes: dict[str, str],
+    update_spec: UpdateSpecification | None,
+    strip_auth: bool,
+    mapping_url: str,
+    solver_backend: SolverBackend,
+    incremental_pip: bool,
+) -> list[LockedDependency]:
+    """
+    Solve specification for a single platform, reusing a cached solution if possible
+
+    Platforms with pip dependencies are never cached, since the state of the pip
+    indexes is not part of the key.
+    """
+    if any(dep.manager == "pip" for dep in spec.dependencies[platform]):
+        logger.debug(f"Not using the solve cache for {platform} with pip dependencies")
+        return solve_for_platform(platform=platform)
+    # The pip solver prefers previously locked versions, so they are part of the key.
+    pip_locked = sorted(
+        (dep.name, dep.version)
+        for dep in (update_spec.locked if update_spec else [])
+        if dep.manager == "pip" and dep.platform == platform
+    )
+    key = solve_cache_key(
+        content_hash=content_hashes[platform],
+        channels=spec.channels,
+        platform=platform,
+        solver=(
+            pathlib.Path(conda).name if solver_backend == "subprocess" else "rattler"
+        ),
+        allow_pypi_requests=spec.allow_pypi_requests,
+        strip_auth=strip_auth,
+        mapping_url=mapping_url,
+        pip_locked=pip_locked,
+        incremental_pip=incremental_pip,
+        conda_lock_version=distribution("conda_lock").version,
+    )
+    if key is not None:
+        cached = load_cached_solve(key)
+        if cached is not None:
+            logger.info(f"Using cached solution for {platform}")
+            return cached
+    deps = solve_for_platform(platform=platform)
+    if key is not None:
+        store_solve(key, deps)
+    return deps
+
+
+def _solve_for_platforms(
+    solve_for_platform: Callable[..., list[LockedDependency]],
+    *,
+    platforms: Sequence[str],
+    jobs: int = 1,
+) -> list[list[LockedDependency]]:
+    """
+    Solve each platform, running up to `jobs` solves in worker threads
+
+    The solutions are returned in the order of `platforms`, regardless of which
+    solve finishes first. The heavy lifting happens in conda subprocesses and in
+    network requests made by the pip solver, so threads are sufficient here.
+    """
+    if jobs <= 1 or len(platforms) <= 1:
+        return [solve_for_platform(platform=platform) for platform in platforms]
+
+    # The tempdir state is thread-local, so forward the caller's setting.
+    delete_temp_paths = tempdir_manager.state.delete_temp_paths
+
+    def solve_in_worker(platform: str) -> list[LockedDependency]:
+        tempdir_manager.state.delete_temp_paths = delete_temp_paths
+        return solve_for_platform(platform=platform)
+
+    logger.debug(f"Solving {len(platforms)} platforms with {jobs} jobs")
+    with ThreadPoolExecutor(max_workers=min(jobs, len(platforms))) as executor:
+        futures = [executor.submit(solve_in_worker, p) for p in platforms]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            # Don't start solves that are still queued if one of them failed.
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
 def convert_structured_metadata_yaml(in_path: pathlib.Path) -> dict[str, Any]:
     with in_path.open("r") as infile:
         metadata = yaml.safe_load(infile)
@@ -879,28 +1015,71 @@ def create_lockfile_from_spec(
     strip_auth: bool = False,
     virtual_package_repo: FakeRepoData,
     mapping_url: str,
+    jobs: int = 1,
+    solve_cache: bool = False,
+    solver_backend: SolverBackend = "subprocess",
+    incremental_pip: bool = False,
 ) -> Lockfile:
     """
     Solve or update specification
+
+    Up to `jobs` platforms are solved concurrently. The resulting lockfile does
+    not depend on the order in which the individual solves finish. Platforms whose
+    pip requirements resolve identically share a single pip resolution.
+
+    If `solve_cache` is set, solutions are looked up in and stored to the
+    persistent solve cache, see `conda_lock.solve_cache`.
     """
     if platforms is None:
         platforms = []
 
     locked: dict[tuple[str, str, str], LockedDependency] = {}
+    content_hashes = compute_content_hashes(spec, virtual_package_repo)
+    pip_pools = PipRepositoryPools()
+    rattler_session = RattlerSession() if solver_backend == "rattler" else None
 
-    for platform in platforms or spec.platforms:
-        deps = _solve_for_arch(
-            conda=conda,
-            spec=spec,
-            platform=platform,
-            channels=[*spec.channels, virtual_package_repo.channel],
-            pip_repositories=spec.pip_repositories,
-            virtual_package_repo=virtual_package_repo,
-            update_spec=update_spec,
-            strip_auth=strip_auth,
-            mapping_url=mapping_url,
+    solve_for_platform: Callable[..., list[LockedDependency]] = partial(
+        _solve_for_arch,
+        conda=conda,
+        spec=spec,
+        channels=[*spec.channels, virtual_package_repo.channel],
+        pip_repositories=spec.pip_repositories,
+        virtual_package_repo=virtual_package_repo,
+        update_spec=update_spec,
+        strip_auth=strip_auth,
+        mapping_url=mapping_url,
+        solver_backend=solver_backend,
+        incremental_pip=incremental_pip,
+        pip_resolutions=PipResolutions(),
+        pip_pools=pip_pools,
+        rattler_session=rattler_session,
+    )
+    if solve_cache:
+        if update_spec is not None and update_spec.update:
+            logger.info("Not using the solve cache when updating packages")
+        else:
+            solve_for_platform = partial(
+                _solve_for_arch_with_cache,
+                solve_for_platform,
+                conda=conda,
+                spec=spec,
+                content_hashes=content_hashes,
+                update_spec=update_spec,
+                strip_auth=strip_auth,
+                mapping_url=mapping_url,
+                solver_backend=solver_backend,
+                incremental_pip=incremental_pip,
+            )
+    try:
+        solutions = _solve_for_platforms(
+            solve_for_platform, platforms=platforms or spec.platforms, jobs=jobs
         )
+    finally:
+        pip_pools.close()
+        if rattler_session is not None:
+            rattler_session.close()
 
+    for deps in solutions:
         for dep in deps:
             locked[(dep.manager, dep.name, dep.platform)] = dep
 
@@ -946,7 +1125,6 @@ def create_lockfile_from_spec(
         inputs_metadata = None
 
     custom_metadata = get_custom_metadata(metadata_yamls=metadata_yamls)
-    content_hashes = compute_content_hashes(spec, virtual_package_repo)
 
     return Lockfile(
         package=[locked[k] for k in locked],
@@ -1023,9 +1201,10 @@ def _strip_auth_from_lockfile(lockfile: str) -> str:
 @contextmanager
 def _render_lockfile_for_install(
     filename: pathlib.Path,
+    lock_content: Lockfile | None,
+    platform: str,
     include_dev_dependencies: bool = True,
     extras: Set[str] | None = None,
-    force_platform: str | None = None,
 ) -> Iterator[pathlib.Path]:
     """
     Render lock content into a temporary, explicit lockfile for the current platform
@@ -1034,21 +1213,21 @@ def _render_lockfile_for_install(
     ----------
     filename :
         Path to conda-lock.yml
+    lock_content :
+        The parsed lockfile, or None if the file is already an explicit or env
+        lockfile
+    platform :
+        Platform to render the lockfile for
     include_dev_dependencies :
         Include development dependencies in output
     extras :
         Optional dependency groups to include in output
 
     """
-    kind = _detect_lockfile_kind(pathlib.Path(filename))
-    if kind in ("explicit", "env"):
+    if lock_content is None:
         yield filename
         return
 
-    lock_content = parse_conda_lock_file(pathlib.Path(filename))
-
-    platform = force_platform or platform_subdir()
-
     if platform not in lock_content.metadata.platforms:
         suggested_platforms_section = "platforms:\n- "
         suggested_platforms_section += "\n- ".join(
@@ -1092,12 +1271,38 @@ def _render_lockfile_for_install(
         yield path
 
 
-def _detect_lockfile_kind(path: pathlib.Path) -> TKindAll:
-    content = path.read_text(encoding="utf-8")
+def _load_lockfile_for_install(
+    path: pathlib.Path, *, platform: str, lockfile_cache: bool = False
+) -> tuple[TKindAll, Lockfile | None]:
+    """Detect the kind of a lockfile, and parse it if it is a conda-lock lockfile.
+
+    Only the packages of `platform` are loaded. With `lockfile_cache`, the lockfile
+    is read only once, whether or not its cached parse is up to date.
+    """
+    if not lockfile_cache:
+        kind = _detect_lockfile_kind(path)
+        if kind != "lock":
+            return kind, None
+        return kind, parse_conda_lock_file(path, platforms=[platform])
+
+    raw_content, key = read_lockfile(path)
+    lock_content = load_parsed_lockfile(path, key)
+    if lock_content is None:
+        kind = _detect_lockfile_kind(path, content=raw_content.decode("utf-8"))
+        if kind != "lock":
+            return kind, None
+        lock_content = parse_and_cache_conda_lock_file(path, raw_content, key)
+    lock_content.package = [p for p in lock_content.package if p.platform == platform]
+    return "lock", lock_content
+
+
+def _detect_lockfile_kind(path: pathlib.Path, content: str | None = None) -> TKindAll:
+    if content is None:
+        content = path.read_text(encoding="utf-8")
     if "@EXPLICIT" in {line.strip() for line in content.splitlines()}:
         return "explicit"
     try:
-        lockfile = yaml.safe_load(content)
+        lockfile = load_yaml(content)
         if {"channels", "dependencies"} <= set(lockfile):
             return "env"
         if "version" in lockfile:
@@ -1187,6 +1392,10 @@ def run_lock(
     metadata_yamls: Sequence[pathlib.Path] = (),
     strip_auth: bool = False,
     mapping_url: str,
+    jobs: int = 1,
+    solve_cache: bool = False,
+    solver_backend: SolverBackend = "subprocess",
+    incremental_pip: bool = False,
 ) -> None:
     if len(environment_files) == 0:
         environment_files = handle_no_specified_source_files(lockfile_path)
@@ -1218,6 +1427,10 @@ def run_lock(
         metadata_yamls=metadata_yamls,
         strip_auth=strip_auth,
         mapping_url=mapping_url,
+        jobs=jobs,
+        solve_cache=solve_cache,
+        solver_backend=solver_backend,
+        incremental_pip=incremental_pip,
     )
 
 
@@ -1388,6 +1601,39 @@ CONTEXT_SETTINGS = {"show_default": True, "help_option_names": ["--help", "-h"]}
     default=False,
     help="Preserve temporary directories and files created during the locking process for debugging purposes.",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of platforms to solve concurrently.",
+    envvar="CONDA_LOCK_JOBS",
+)
+@click.option(
+    "--solve-cache/--no-solve-cache",
+    default=False,
+    help="Reuse solutions from a persistent cache when the specification and the channel repodata are unchanged.",
+    envvar="CONDA_LOCK_SOLVE_CACHE",
+)
+@click.option(
+    "--solver-backend",
+    type=click.Choice(["subprocess", "rattler"]),
+    default="subprocess",
+    help="Solve conda packages with conda in a subprocess, or in-process with py-rattler.",
+    envvar="CONDA_LOCK_SOLVER_BACKEND",
+)
+@click.option(
+    "--pkgs-cache/--no-pkgs-cache",
+    default=False,
+    help="Share conda's package and repodata cache between runs instead of starting from an empty one.",
+    envvar="CONDA_LOCK_PKGS_CACHE",
+)
+@click.option(
+    "--incremental-pip/--no-incremental-pip",
+    default=False,
+    help="Keep the previously locked pip packages of unchanged pip requirements instead of resolving them again.",
+    envvar="CONDA_LOCK_INCREMENTAL_PIP",
+)
 @click.pass_context
 def lock(
     ctx: click.Context,
@@ -1414,6 +1660,11 @@ def lock(
     metadata_choices: Sequence[str] = (),
     metadata_yamls: Sequence[PathLike] = (),
     preserve_temp_dirs: bool = False,
+    jobs: int = 1,
+    solve_cache: bool = False,
+    solver_backend: SolverBackend = "subprocess",
+    pkgs_cache: bool = False,
+    incremental_pip: bool = False,
 ) -> None:
     """Generate fully reproducible lock files for conda environments.
 
@@ -1435,6 +1686,9 @@ def lock(
     # Set the flag for deleting temporary paths (files/dirs)
     tempdir_manager.state.delete_temp_paths = not preserve_temp_dirs
 
+    if pkgs_cache:
+        use_persistent_pkgs_dir()
+
     # Set Pypi <--> Conda lookup file location
     mapping_url = (
         DEFAULT_MAPPING_URL
@@ -1484,6 +1738,10 @@ def lock(
         metadata_yamls=[pathlib.Path(path) for path in metadata_yamls],
         strip_auth=strip_auth,
         mapping_url=mapping_url,
+        jobs=jobs,
+        solve_cache=solve_cache,
+        solver_backend=solver_backend,
+        incremental_pip=incremental_pip,
     )
     if strip_auth:
         with tempfile.TemporaryDirectory() as tempdir:
@@ -1578,6 +1836,12 @@ DEFAULT_INSTALL_OPT_LOCK_FILE = pathlib.Path(DEFAULT_LOCKFILE_NAME)
     default=False,
     help="Preserve temporary directories and files created during the installation process for debugging purposes.",
 )
+@click.option(
+    "--lockfile-cache/--no-lockfile-cache",
+    default=False,
+    help="Cache the parsed lockfile in the user cache directory and reuse it while the lockfile is unchanged.",
+    envvar="CONDA_LOCK_LOCKFILE_CACHE",
+)
 @click.argument("lock-file", default=DEFAULT_INSTALL_OPT_LOCK_FILE, type=click.Path())
 @click.pass_context
 def click_install(
@@ -1597,6 +1861,7 @@ def click_install(
     extras: list[str],
     force_platform: str,
     preserve_temp_dirs: bool,
+    lockfile_cache: bool,
 ) -> None:
     # bail out if we do not encounter the lockfile
     lock_file = pathlib.Path(lock_file)
@@ -1624,6 +1889,7 @@ def click_install(
         dev=dev,
         extras=extras,
         force_platform=force_platform,
+        lockfile_cache=lockfile_cache,
     )
 
 
@@ -1641,6 +1907,7 @@ def install(
     dev: bool = DEFAULT_INSTALL_OPT_DEV,
     extras: list[str] | None = None,
     force_platform: str | None = None,
+    lockfile_cache: bool = False,
 ) -> None:
     if extras is None:
         extras = []
@@ -1651,7 +1918,11 @@ def install(
     install_func = partial(
         do_conda_install, conda=_conda_exe, prefix=prefix, name=name, copy=copy
     )
-    if validate_platform and _detect_lockfile_kind(lock_file) != "lock":
+    platform = force_platform or platform_subdir()
+    kind, lock_content = _load_lockfile_for_install(
+        lock_file, platform=platform, lockfile_cache=lockfile_cache
+    )
+    if validate_platform and kind != "lock":
         lockfile_contents = read_file(lock_file)
         try:
             do_validate_platform(lockfile_contents)
@@ -1661,9 +1932,10 @@ def install(
             )
     with _render_lockfile_for_install(
         lock_file,
+        lock_content,
+        platform=platform,
         include_dev_dependencies=dev,
         extras=set(extras),
-        force_platform=force_platform,
     ) as lockfile:
         if _auth is not None:
             with _add_auth(read_file(lockfile), _auth) as lockfile_with_auth:
@@ -1715,6 +1987,12 @@ def install(
     multiple=True,
     help="render lock files for the following platforms",
 )
+@click.option(
+    "--lockfile-cache/--no-lockfile-cache",
+    default=False,
+    help="Cache the parsed lockfile in the user cache directory and reuse it while the lockfile is unchanged.",
+    envvar="CONDA_LOCK_LOCKFILE_CACHE",
+)
 @click.argument("lock-file", default=DEFAULT_LOCKFILE_NAME)
 @click.pass_context
 def render(
@@ -1727,6 +2005,7 @@ def render(
     lock_file: PathLike,
     pdb: bool,
     platform: Sequence[str],
+    lockfile_cache: bool,
 ) -> None:
     """Render multi-platform lockfile into single-platform env or explicit file"""
     logging.basicConfig(level=log_level, force=True)
@@ -1741,7 +2020,7 @@ def render(
         print(ctx.get_help())
         sys.exit(1)
 
-    lock_content = parse_conda_lock_file(lock_file)
+    lock_content = parse_conda_lock_file(lock_file, use_cache=lockfile_cache)
 
     do_render(
         lock_content,
@@ -6,14 +6,18 @@ import shlex
 import shutil
 import subprocess
 import sys
+import threading
 import time
 
 from collections.abc import Iterable, Iterator, MutableSequence, Sequence
 from contextlib import contextmanager
+from functools import lru_cache
 from textwrap import dedent
 from typing import (
+    IO,
     Any,
     Literal,
+    NamedTuple,
 )
 from urllib.parse import urlsplit, urlunsplit
 
@@ -30,11 +34,19 @@ from conda_lock.lockfile.v2prelim.models import HashModel, LockedDependency
 from conda_lock.models.channel import Channel, normalize_url_with_placeholders
 from conda_lock.models.dry_run_install import DryRunInstall, FetchAction, LinkAction
 from conda_lock.models.lock_spec import Dependency, VersionedDependency
+from conda_lock.rattler_solver import RattlerSession, solve_specs_in_process
 from conda_lock.tempdir_manager import temporary_directory
 
 
 logger = logging.getLogger(__name__)
 
+SolverBackend = Literal["subprocess", "rattler"]
+"""How conda specifications are solved.
+
+- "subprocess": with a dry-run install of conda, mamba, or micromamba
+- "rattler": in-process with py-rattler, see `conda_lock.rattler_solver`
+"""
+
 
 def _to_match_spec(
     conda_dep_name: str,
@@ -62,6 +74,44 @@ def _to_match_spec(
         return ms.conda_build_form()
 
 
+MATCH_SPEC_CACHE_SIZE = 16384
+"""Maximum number of parsed or merged match specs kept in memory"""
+
+
+@lru_cache(maxsize=MATCH_SPEC_CACHE_SIZE)
+def _parse_match_spec(spec: str) -> MatchSpec:
+    """Parse a dependency string, reusing the result across packages and platforms.
+
+    The same strings (e.g. `python >=3.10,<3.11.0a0`) appear in the `depends` of
+    many packages, so they are only parsed once per process.
+    """
+    return MatchSpec(spec)  # pyright: ignore[reportArgumentType]
+
+
+@lru_cache(maxsize=MATCH_SPEC_CACHE_SIZE)
+def _merged_version_spec(specs: tuple[str, ...]) -> str:
+    """Merge the dependency strings for a single package into a version spec.
+
+    >>> _merged_version_spec(("python >=3.10",))
+    '>=3.10'
+    >>> _merged_version_spec(("python", "python >=3.10"))
+    '>=3.10'
+    >>> _merged_version_spec(("python",))
+    ''
+    """
+    matchspecs = [_parse_match_spec(spec) for spec in specs]
+    merged_matchspec = (
+        matchspecs[0] if len(matchspecs) == 1 else MatchSpec.merge(matchspecs)[0]
+    )
+    if merged_matchspec.version is None:
+        return ""
+    return merged_matchspec.version.spec_str
+
+
+REPODATA_RECORD_RETRY_DELAY = 1.0
+"""Seconds to wait before looking again for missing repodata_record.json files"""
+
+
 def extract_json_object(proc_stdout: str) -> str:
     try:
         return proc_stdout[proc_stdout.index("{") : proc_stdout.rindex("}") + 1]
@@ -69,6 +119,206 @@ def extract_json_object(proc_stdout: str) -> str:
         return proc_stdout
 
 
+class _IncrementalJSONReader:
+    """Decode JSON values one at a time from a text stream.
+
+    Only the data that has not been decoded yet is kept in memory, plus the first
+    `head_size` characters of the stream for error messages.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        chunk_size: int = 64 * 1024,
+        head_size: int = 64 * 1024,
+    ) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._head_size = head_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.head = ""
+
+    def _read_more(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if len(self.head) < self._head_size:
+            self.head += chunk[: self._head_size - len(self.head)]
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def skip_until(self, char: str) -> None:
+        """Skip everything up to the next occurrence of `char`."""
+        while (index := self._buffer.find(char, self._pos)) < 0:
+            self._pos = len(self._buffer)
+            if not self._read_more():
+                raise self.error(f"Expecting {char!r}")
+        self._pos = index
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self._pos += 1
+
+    def decode(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # A number at the end of the buffer might continue in the next chunk.
+            if end == len(self._buffer) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def drain(self) -> None:
+        """Consume the rest of the stream."""
+        while self._read_more():
+            self._buffer = ""
+            self._pos = 0
+
+
+def _iter_dry_run_json(
+    reader: _IncrementalJSONReader,
+) -> Iterator[tuple[tuple[Any, ...], Any]]:
+    """Incrementally parse the JSON object printed by a dry run.
+
+    Any text preceding the object is skipped, like in `extract_json_object`.
+    Yields `(path, value)` pairs: `((key,), value)` for top-level entries other
+    than "actions", `(("actions", key), value)` for the entries of "actions", and
+    `(("actions", key, index), action)` for each element of a list of actions as
+    soon as it has been read. Lists are announced as empty lists before their
+    elements.
+    """
+
+    def iter_members() -> Iterator[str]:
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.expect("}")
+            return
+        while True:
+            key = reader.decode()
+            if not isinstance(key, str):
+                raise reader.error("Expecting property name")
+            reader.expect(":")
+            yield key
+            if reader.peek() == ",":
+                reader.expect(",")
+            else:
+                reader.expect("}")
+                return
+
+    reader.skip_until("{")
+    for key in iter_members():
+        if key != "actions" or reader.peek() != "{":
+            yield (key,), reader.decode()
+            continue
+        for action_key in iter_members():
+            if reader.peek() != "[":
+                yield ("actions", action_key), reader.decode()
+                continue
+            yield ("actions", action_key), []
+            reader.expect("[")
+            index = 0
+            while reader.peek() != "]":
+                if index:
+                    reader.expect(",")
+                yield ("actions", action_key, index), reader.decode()
+                index += 1
+            reader.expect("]")
+
+
+def _load_dry_run_json(reader: _IncrementalJSONReader) -> dict[str, Any]:
+    """Load the JSON object printed by a dry run.
+
+    This is equivalent to `json.loads(extract_json_object(stdout))`, but the
+    actions are decoded one by one while they are read, so that the raw output
+    never needs to be held in memory at once.
+
+    >>> import io
+    >>> _load_dry_run_json(_IncrementalJSONReader(io.StringIO(
+    ...     'Preamble {"actions": {"FETCH": [], "LINK": [{"name": "a"}, {"name": "b"}],'
+    ...     ' "PREFIX": "/p"}, "success": true}'
+    ... )))
+    {'actions': {'FETCH': [], 'LINK': [{'name': 'a'}, {'name': 'b'}], 'PREFIX': '/p'}, 'success': True}
+    """
+    result: dict[str, Any] = {}
+    for path, value in _iter_dry_run_json(reader):
+        if len(path) == 3:
+            result["actions"][path[1]].append(value)
+        elif len(path) == 2:
+            result.setdefault("actions", {})[path[1]] = value
+        else:
+            result[path[0]] = value
+    return result
+
+
+class _DryRunOutput(NamedTuple):
+    returncode: int
+    result: dict[str, Any] | None
+    """The parsed JSON output, or None if it could not be parsed"""
+    stdout: str
+    """The start of stdout, for error messages"""
+    stderr: str
+
+
+def _run_dry_run(args: Sequence[str], env: dict[str, str]) -> _DryRunOutput:
+    """Run a dry run and parse its JSON output while it is being written."""
+    with subprocess.Popen(
+        args,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf8",
+    ) as proc:
+        assert proc.stdout is not None and proc.stderr is not None
+        stderr: list[str] = []
+        # Consume stderr concurrently so that the child never blocks on writing it.
+        stderr_thread = threading.Thread(
+            target=stderr.extend, args=(proc.stderr,), daemon=True
+        )
+        stderr_thread.start()
+        reader = _IncrementalJSONReader(proc.stdout)
+        result: dict[str, Any] | None
+        try:
+            result = _load_dry_run_json(reader)
+        except json.JSONDecodeError:
+            result = None
+        reader.drain()
+        stderr_thread.join()
+    return _DryRunOutput(
+        returncode=proc.returncode,
+        result=result,
+        stdout=reader.head,
+        stderr="".join(stderr),
+    )
+
+
 def solve_conda(
     conda: PathLike,
     specs: dict[str, Dependency],
@@ -77,6 +327,8 @@ def solve_conda(
     platform: str,
     channels: list[Channel],
     mapping_url: str,
+    solver_backend: SolverBackend = "subprocess",
+    rattler_session: RattlerSession | None = None,
 ) -> dict[str, LockedDependency]:
     """
     Solve (or update a previous solution of) conda specs for the given platform
@@ -95,6 +347,10 @@ def solve_conda(
         Target platform
     channels :
         Channels to query
+    solver_backend :
+        Whether to solve with `conda` in a subprocess or in-process with rattler
+    rattler_session :
+        Repodata shared with the other platforms of the lock (rattler backend only)
 
     """
 
@@ -106,7 +362,17 @@ def solve_conda(
     conda_locked = {dep.name: dep for dep in locked.values() if dep.manager == "conda"}
     to_update = set(update).intersection(conda_locked)
 
-    if to_update:
+    dry_run_install: DryRunInstall | dict[str, dict[str, list[Any]]]
+    if solver_backend == "rattler":
+        dry_run_install = solve_specs_in_process(
+            platform=platform,
+            channels=channels,
+            specs=conda_specs,
+            locked=conda_locked if to_update else None,
+            update=list(to_update),
+            session=rattler_session,
+        )
+    elif to_update:
         dry_run_install = update_specs_for_arch(
             conda=conda,
             platform=platform,
@@ -127,23 +393,15 @@ def solve_conda(
     # extract dependencies from package plan
     planned = {}
     for action in dry_run_install["actions"]["FETCH"]:
-        dependency_specs: dict[str, list[MatchSpec]] = {}
+        dependency_specs: dict[str, list[str]] = {}
         for dep in action.get("depends") or []:
-            matchspec = MatchSpec(dep)  # pyright: ignore[reportArgumentType]
-            dependency_specs.setdefault(matchspec.name, []).append(matchspec)
-
-        dependencies = {}
-        for name, matchspecs in dependency_specs.items():
-            merged_matchspec = (
-                matchspecs[0]
-                if len(matchspecs) == 1
-                else MatchSpec.merge(matchspecs)[0]
-            )
-            dependencies[name] = (
-                merged_matchspec.version.spec_str
-                if merged_matchspec.version is not None
-                else ""
-            )
+            name = _parse_match_spec(dep).name
+            dependency_specs.setdefault(name, []).append(dep)
+
+        dependencies = {
+            name: _merged_version_spec(tuple(specs))
+            for name, specs in dependency_specs.items()
+        }
 
         locked_dependency = LockedDependency(
             name=action["name"],
@@ -160,6 +418,11 @@ def solve_conda(
             ),
         )
         planned[action["name"]] = locked_dependency
+    logger.debug(
+        "MatchSpec cache: parse %s, merge %s",
+        _parse_match_spec.cache_info(),
+        _merged_version_spec.cache_info(),
+    )
 
     # propagate categories from explicit to transitive dependencies
     apply_categories(
@@ -171,31 +434,63 @@ def solve_conda(
     return planned
 
 
-def _get_repodata_record(
-    pkgs_dirs: list[pathlib.Path], dist_name: str
-) -> FetchAction | None:
-    """Get the repodata_record.json of a given distribution from the package cache.
+def _index_repodata_records(
+    pkgs_dirs: list[pathlib.Path], dist_names: Iterable[str]
+) -> dict[str, pathlib.Path]:
+    """Find the repodata_record.json of the given distributions in the package cache.
+
+    Each package cache directory is listed only once. When a distribution is present
+    in several package caches, the first one in `pkgs_dirs` wins.
+    """
+    wanted = set(dist_names)
+    records: dict[str, pathlib.Path] = {}
+    for pkgs_dir in pkgs_dirs:
+        try:
+            entries = list(os.scandir(pkgs_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name not in wanted or entry.name in records:
+                continue
+            record = pathlib.Path(entry.path) / "info" / "repodata_record.json"
+            if record.exists():
+                records[entry.name] = record
+    return records
+
+
+def _get_repodata_records(
+    pkgs_dirs: list[pathlib.Path], dist_names: Iterable[str]
+) -> dict[str, FetchAction]:
+    """Get the repodata_record.json of the given distributions from the package cache.
 
     On rare occasion during the CI tests, conda fails to find a package in the
     package cache, perhaps because the package is still being processed? Waiting for
-    0.1 seconds seems to solve the issue. Here we allow for a full second to elapse
-    before giving up.
+    a short while seems to solve the issue. Here we allow for a full second to elapse
+    before looking for the missing records once more.
+
+    Distributions whose record cannot be found are omitted from the result.
     """
-    NUM_RETRIES = 10
-    for retry in range(1, NUM_RETRIES + 1):
-        for pkgs_dir in pkgs_dirs:
-            record = pkgs_dir / dist_name / "info" / "repodata_record.json"
-            if record.exists():
-                with open(record) as f:
-                    repodata: FetchAction = json.load(f)
-                return repodata
+    dist_names = set(dist_names)
+    records = _index_repodata_records(pkgs_dirs, dist_names)
+    missing = dist_names.difference(records)
+    if missing:
         logger.warning(
-            f"Failed to find repodata_record.json for {dist_name}. "
-            f"Retrying in 0.1 seconds ({retry}/{NUM_RETRIES})"
+            f"Failed to find repodata_record.json for {sorted(missing)}. "
+            f"Retrying in {REPODATA_RECORD_RETRY_DELAY} seconds"
         )
-        time.sleep(0.1)
-    logger.warning(f"Failed to find repodata_record.json for {dist_name}. Giving up.")
-    return None
+        time.sleep(REPODATA_RECORD_RETRY_DELAY)
+        records.update(_index_repodata_records(pkgs_dirs, missing))
+        missing.difference_update(records)
+        if missing:
+            logger.warning(
+                f"Failed to find repodata_record.json for {sorted(missing)}. Giving up."
+            )
+
+    repodata_records: dict[str, FetchAction] = {}
+    for dist_name, record in records.items():
+        with open(record) as f:
+            repodata_records[dist_name] = json.load(f)
+    return repodata_records
 
 
 def _get_pkgs_dirs(
@@ -230,6 +525,47 @@ def _get_pkgs_dirs(
     return pkgs_dirs
 
 
+_PKGS_DIRS_CACHE: dict[
+    tuple[str, str, tuple[tuple[str, str], ...]], list[pathlib.Path]
+] = {}
+_PKGS_DIRS_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_pkgs_dirs(*, conda: PathLike, platform: str) -> list[pathlib.Path]:
+    """Like `_get_pkgs_dirs`, but memoized for the life of the process.
+
+    Since `conda_env_override` pins `CONDA_PKGS_DIRS`, the answer only changes with
+    the conda executable, the platform, or the environment it is invoked with.
+    """
+    env = conda_env_override(platform)
+    key = (str(conda), platform, tuple(sorted(env.items())))
+    with _PKGS_DIRS_CACHE_LOCK:
+        cached = _PKGS_DIRS_CACHE.get(key)
+    if cached is None:
+        cached = _get_pkgs_dirs(conda=conda, platform=platform)
+        with _PKGS_DIRS_CACHE_LOCK:
+            _PKGS_DIRS_CACHE[key] = cached
+    else:
+        logger.debug(f"Using cached pkgs_dirs for {conda} on {platform}: {cached}")
+    return list(cached)
+
+
+def _get_dist_name(link_action: LinkAction) -> str:
+    """Get the name of the package cache directory of a linked distribution."""
+    if "dist_name" in link_action:
+        return link_action["dist_name"]
+    elif "fn" in link_action:
+        dist_name = str(link_action["fn"])
+        if dist_name.endswith(".tar.bz2"):
+            return dist_name[:-8]
+        elif dist_name.endswith(".conda"):
+            return dist_name[:-6]
+        else:
+            raise ValueError(f"Unknown filename format: {dist_name}")
+    else:
+        raise ValueError(f"Unable to extract the dist_name from {link_action}.")
+
+
 def _reconstruct_fetch_actions(
     conda: PathLike,
     platform: str,
@@ -250,25 +586,16 @@ def _reconstruct_fetch_actions(
     fetch_actions = {p["name"]: p for p in dry_run_install["actions"]["FETCH"]}
     link_only_names = set(link_actions.keys()).difference(fetch_actions.keys())
     if link_only_names:
-        pkgs_dirs = _get_pkgs_dirs(conda=conda, platform=platform)
+        pkgs_dirs = _get_cached_pkgs_dirs(conda=conda, platform=platform)
     else:
         pkgs_dirs = []
 
-    for link_pkg_name in link_only_names:
-        link_action = link_actions[link_pkg_name]
-        if "dist_name" in link_action:
-            dist_name = link_action["dist_name"]
-        elif "fn" in link_action:
-            dist_name = str(link_action["fn"])
-            if dist_name.endswith(".tar.bz2"):
-                dist_name = dist_name[:-8]
-            elif dist_name.endswith(".conda"):
-                dist_name = dist_name[:-6]
-            else:
-                raise ValueError(f"Unknown filename format: {dist_name}")
-        else:
-            raise ValueError(f"Unable to extract the dist_name from {link_action}.")
-        repodata = _get_repodata_record(pkgs_dirs, dist_name)
+    dist_names = [
+        _get_dist_name(link_actions[link_pkg_name]) for link_pkg_name in link_only_names
+    ]
+    repodata_records = _get_repodata_records(pkgs_dirs, dist_names)
+    for dist_name in dist_names:
+        repodata = repodata_records.get(dist_name)
         if repodata is None:
             raise FileNotFoundError(
                 f"Distribution '{dist_name}' not found in pkgs_dirs {pkgs_dirs}"
@@ -310,90 +637,67 @@ def solve_specs_for_arch(
     args.extend(specs)
     logger.info("%s using specs %s", platform, specs)
     logger.debug(f"Running command {shlex.join(args)}")
-    proc = subprocess.run(  # noqa: UP022  # Poetry monkeypatch breaks capture_output
-        [str(arg) for arg in args],
-        env=conda_env_override(platform),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        encoding="utf8",
-    )
-
-    def print_proc(proc: subprocess.CompletedProcess) -> None:
-        print(f"    Command: {proc.args}", file=sys.stderr)
-        if proc.stdout:
-            print(f"    STDOUT:\n{proc.stdout}", file=sys.stderr)
-        if proc.stderr:
-            print(f"    STDERR:\n{proc.stderr}", file=sys.stderr)
-
-    try:
-        proc.check_returncode()
-    except subprocess.CalledProcessError:
-        try:
-            err_json = json.loads(proc.stdout)
+    cmd = [str(arg) for arg in args]
+    output = _run_dry_run(cmd, env=conda_env_override(platform))
+
+    def print_output(output: _DryRunOutput) -> None:
+        print(f"    Command: {cmd}", file=sys.stderr)
+        if output.stdout:
+            print(f"    STDOUT:\n{output.stdout}", file=sys.stderr)
+        if output.stderr:
+            print(f"    STDERR:\n{output.stderr}", file=sys.stderr)
+
+    if output.returncode != 0:
+        if output.result is not None:
             try:
-                message = err_json["message"]
+                message = output.result["message"]
             except KeyError:
                 print("Message key not found in json! returning the full json text")
-                message = err_json
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse json, {e}", file=sys.stderr)
-            message = proc.stdout
+                message = output.result
+        else:
+            print("Failed to parse json", file=sys.stderr)
+            message = output.stdout
 
         print(
             f"Could not lock the environment for platform {platform}", file=sys.stderr
         )
         if message:
             print(message, file=sys.stderr)
-        print_proc(proc)
+        print_output(output)
 
-        raise
+        raise subprocess.CalledProcessError(
+            output.returncode, cmd, output=output.stdout, stderr=output.stderr
+        )
 
-    try:
-        dryrun_install: DryRunInstall = json.loads(extract_json_object(proc.stdout))
-        return _reconstruct_fetch_actions(conda, platform, dryrun_install)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Failed to parse json: '{proc.stdout}'") from e
+    if output.result is None:
+        raise RuntimeError(f"Failed to parse json: '{output.stdout}'")
+    dryrun_install: DryRunInstall = output.result  # type: ignore[assignment]
+    return _reconstruct_fetch_actions(conda, platform, dryrun_install)
 
 
-def _get_installed_conda_packages(
-    conda: PathLike,
-    platform: str,
-    prefix: str,
-) -> dict[str, LinkAction]:
+def _read_installed_conda_packages(prefix: str) -> dict[str, LinkAction]:
     """
-    Get the installed conda packages for the given prefix.
+    Get the installed conda packages for the given prefix from its conda-meta records.
 
-    Try to get installed packages, first with --no-pip flag, then without if that fails.
-    The --no-pip flag was added in Conda v2.1.0 (2013), but for mamba/micromamba only in
-    v2.0.7 (March 2025).
+    For the prefixes created by `fake_conda_environment` this yields the same
+    packages as `conda list --json`, but it does not need to start a conda process
+    for every platform that is updated.
     """
-    try:
-        output = subprocess.check_output(
-            [str(conda), "list", "--no-pip", "-p", prefix, "--json"],
-            env=conda_env_override(platform),
-            stderr=subprocess.STDOUT,
+    installed: dict[str, LinkAction] = {}
+    for record_path in sorted((pathlib.Path(prefix) / "conda-meta").glob("*.json")):
+        with open(record_path) as f:
+            record = json.load(f)
+        base_url = record["channel"].rstrip("/")
+        if base_url.endswith("/" + record["subdir"]):
+            base_url = base_url[: -len(record["subdir"]) - 1]
+        installed[record["name"]] = LinkAction(
+            base_url=base_url,
+            channel=urlsplit(base_url).path.strip("/"),
+            dist_name=record_path.stem,
+            name=record["name"],
+            platform=record["subdir"],
+            version=record["version"],
         )
-    except subprocess.CalledProcessError as e:
-        err_output = (
-            e.output.decode("utf-8") if isinstance(e.output, bytes) else e.output
-        )
-        if "The following argument was not expected: --no-pip" in err_output:
-            logger.warning(
-                f"The '--no-pip' flag is not supported by {conda}. Please consider upgrading."
-            )
-            # Retry without --no-pip
-            output = subprocess.check_output(
-                [str(conda), "list", "-p", prefix, "--json"],
-                env=conda_env_override(platform),
-                stderr=subprocess.STDOUT,
-            )
-        else:
-            # Re-raise if it's a different error.
-            raise
-    decoded_output = output.decode("utf-8")
-    installed: dict[str, LinkAction] = {
-        entry["name"]: entry for entry in json.loads(decoded_output)
-    }
     return installed
 
 
@@ -426,7 +730,7 @@ def update_specs_for_arch(
     """
 
     with fake_conda_environment(locked.values(), platform=platform) as prefix:
-        installed = _get_installed_conda_packages(conda, platform, prefix)
+        installed = _read_installed_conda_packages(prefix)
         spec_for_name = {MatchSpec(v).name: v for v in specs}  # pyright: ignore
         to_update = [
             spec_for_name[name] for name in set(installed).intersection(update)
@@ -472,23 +776,17 @@ def update_specs_for_arch(
                 for arg in [*args, "-p", prefix, "--json", "--dry-run", *to_update]
             ]
             logger.debug(f"Running command {shlex.join(cmd)}")
-            proc = subprocess.run(  # noqa: UP022  # Poetry monkeypatch breaks capture_output
-                cmd,
-                env=conda_env_override(platform),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                encoding="utf8",
-            )
+            output = _run_dry_run(cmd, env=conda_env_override(platform))
 
-            try:
-                proc.check_returncode()
-            except subprocess.CalledProcessError as exc:
-                err_json = json.loads(proc.stdout)
+            if output.returncode != 0:
+                message = (output.result or {}).get("message", output.stdout)
                 raise RuntimeError(
-                    f"Could not lock the environment for platform {platform}: {err_json.get('message')}"
-                ) from exc
+                    f"Could not lock the environment for platform {platform}: {message}"
+                )
+            if output.result is None:
+                raise RuntimeError(f"Failed to parse json: '{output.stdout}'")
 
-            dryrun_install: DryRunInstall = json.loads(extract_json_object(proc.stdout))
+            dryrun_install: DryRunInstall = output.result  # type: ignore[assignment]
         else:
             dryrun_install = {"actions": {"LINK": [], "FETCH": []}}
 
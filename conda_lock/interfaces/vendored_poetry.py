@@ -26,6 +26,7 @@ from conda_lock._vendor.poetry.factory import Factory
 from conda_lock._vendor.poetry.installation.chooser import Chooser
 from conda_lock._vendor.poetry.installation.operations.operation import Operation
 from conda_lock._vendor.poetry.puzzle import Solver as PoetrySolver
+from conda_lock._vendor.poetry.puzzle.exceptions import SolverProblemError
 from conda_lock._vendor.poetry.repositories.pypi_repository import PyPiRepository
 from conda_lock._vendor.poetry.repositories.repository import Repository
 from conda_lock._vendor.poetry.repositories.repository_pool import (
@@ -52,6 +53,7 @@ __all__ = [
     "Pool",
     "PyPiRepository",
     "Repository",
+    "SolverProblemError",
     "VersionConstraint",
     "VirtualEnv",
 ]
@@ -5,13 +5,17 @@ import shlex
 import shutil
 import subprocess
 import threading
+import time
+import uuid
 
 from collections.abc import Iterator, Sequence
 from logging import getLogger
 from typing import IO, TypeAlias
 
 from ensureconda.api import determine_micromamba_version, ensureconda
+from filelock import FileLock, Timeout
 from packaging.version import Version
+from platformdirs import user_cache_path
 
 from conda_lock.models.channel import Channel
 from conda_lock.tempdir_manager import mkdtemp_with_cleanup
@@ -23,6 +27,18 @@ PathLike: TypeAlias = str | pathlib.Path
 
 CONDA_PKGS_DIRS: str | None = None
 MAMBA_ROOT_PREFIX: str | None = None
+# Platforms may be solved concurrently, so guard the lazy initialization above.
+_TEMP_DIRS_LOCK = threading.Lock()
+
+PERSISTENT_PKGS_DIR: pathlib.Path | None = None
+"""If set, this directory is used as CONDA_PKGS_DIRS instead of a temporary one."""
+
+PERSISTENT_PKGS_DIR_MAX_AGE_SECONDS = 60 * 60 * 24 * 7  # 7 days
+"""Entries of the persistent package cache older than this are removed."""
+
+_PERSISTENT_PKGS_DIR_USER_LOCK: FileLock | None = None
+"""Held while this process uses the persistent package cache, see
+`_prepare_persistent_pkgs_dir`."""
 
 
 def _ensureconda(
@@ -300,26 +316,140 @@ def _get_conda_flags(channels: Sequence[Channel], platform: str) -> list[str]:
 
 def conda_pkgs_dir() -> str:
     global CONDA_PKGS_DIRS
-    if CONDA_PKGS_DIRS is None:
-        CONDA_PKGS_DIRS = mkdtemp_with_cleanup(prefix="conda-lock-pkgs-")
-    return CONDA_PKGS_DIRS
+    with _TEMP_DIRS_LOCK:
+        if CONDA_PKGS_DIRS is None:
+            if PERSISTENT_PKGS_DIR is not None:
+                CONDA_PKGS_DIRS = _prepare_persistent_pkgs_dir(PERSISTENT_PKGS_DIR)
+            else:
+                CONDA_PKGS_DIRS = mkdtemp_with_cleanup(prefix="conda-lock-pkgs-")
+        return CONDA_PKGS_DIRS
+
+
+def default_persistent_pkgs_dir() -> pathlib.Path:
+    return user_cache_path("conda-lock", appauthor=False) / "cache" / "pkgs"
+
+
+def use_persistent_pkgs_dir(path: PathLike | None = None) -> None:
+    """Share the package cache (including the repodata cache) between runs.
+
+    By default, every conda-lock process starts with an empty temporary package
+    cache, so conda downloads the repodata of every channel again. After calling
+    this, the directory `path` (by default in the user cache directory) is used
+    instead. It must be called before conda is invoked for the first time.
+    """
+    global PERSISTENT_PKGS_DIR
+    with _TEMP_DIRS_LOCK:
+        PERSISTENT_PKGS_DIR = (
+            default_persistent_pkgs_dir() if path is None else pathlib.Path(path)
+        )
+
+
+def _prepare_persistent_pkgs_dir(
+    pkgs_dir: pathlib.Path,
+    *,
+    max_age_seconds: float = PERSISTENT_PKGS_DIR_MAX_AGE_SECONDS,
+) -> str:
+    """Create the persistent package cache and remove old entries from it.
+
+    Several conda-lock processes, and the conda processes they start, may use the
+    package cache at the same time. Each conda-lock process registers itself as a
+    user of the cache by holding a lock on its own file in the sibling `.users`
+    directory until it exits. Old entries are only removed when no other process is
+    registered, and registering and pruning both happen under the `.lock` file, so
+    that no process can start using the cache while it is pruned. Conda and
+    micromamba protect their own writes to the cache.
+    """
+    global _PERSISTENT_PKGS_DIR_USER_LOCK
+    users_dir = pkgs_dir.with_name(pkgs_dir.name + ".users")
+    pkgs_dir.mkdir(parents=True, exist_ok=True)
+    users_dir.mkdir(exist_ok=True)
+    with FileLock(str(pkgs_dir.with_name(pkgs_dir.name + ".lock"))):
+        if _has_other_users(users_dir):
+            logger.debug(f"Not pruning the package cache {pkgs_dir} while in use")
+        else:
+            prune_pkgs_dir(pkgs_dir, max_age_seconds=max_age_seconds)
+        user_lock = FileLock(str(users_dir / f"{os.getpid()}-{uuid.uuid4().hex}.lock"))
+        user_lock.acquire()
+    _PERSISTENT_PKGS_DIR_USER_LOCK = user_lock
+    logger.debug(f"Using persistent package cache {pkgs_dir}")
+    return str(pkgs_dir)
+
+
+def _has_other_users(users_dir: pathlib.Path) -> bool:
+    """Check if a process has registered itself as a user of a package cache.
+
+    The files of processes that have exited are removed.
+    """
+    has_users = False
+    for path in users_dir.glob("*.lock"):
+        lock = FileLock(str(path), timeout=0)
+        try:
+            lock.acquire()
+        except Timeout:
+            has_users = True
+            continue
+        lock.release()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return has_users
+
+
+def prune_pkgs_dir(pkgs_dir: pathlib.Path, *, max_age_seconds: float) -> None:
+    """Remove entries of a package cache that were not modified for `max_age_seconds`.
+
+    The files of the repodata cache in the `cache` subdirectory are pruned one by one,
+    while extracted packages and other entries are removed as a whole.
+    """
+    now = time.time()
+
+    def is_old(path: pathlib.Path) -> bool:
+        try:
+            return now - path.stat().st_mtime >= max_age_seconds
+        except FileNotFoundError:
+            return False
+
+    for entry in pkgs_dir.iterdir():
+        try:
+            if entry.name == "cache" and entry.is_dir():
+                for file in entry.iterdir():
+                    if file.is_file() and is_old(file):
+                        file.unlink()
+                        logger.debug(f"Removed old repodata cache file {file}")
+            elif is_old(entry):
+                if entry.is_dir():
+                    shutil.rmtree(entry)
+                else:
+                    entry.unlink()
+                logger.debug(f"Removed old package cache entry {entry}")
+        except OSError as e:
+            # Another process might be using or removing the same entry.
+            logger.debug(f"Failed to remove {entry} from the package cache: {e}")
 
 
 def mamba_root_prefix() -> str:
     """Legacy root prefix used by micromamba"""
     global MAMBA_ROOT_PREFIX
-    if MAMBA_ROOT_PREFIX is None:
-        MAMBA_ROOT_PREFIX = mkdtemp_with_cleanup(prefix="conda-lock-mamba-root-")
-        os.environ["MAMBA_ROOT_PREFIX"] = MAMBA_ROOT_PREFIX
-    return MAMBA_ROOT_PREFIX
+    with _TEMP_DIRS_LOCK:
+        if MAMBA_ROOT_PREFIX is None:
+            MAMBA_ROOT_PREFIX = mkdtemp_with_cleanup(prefix="conda-lock-mamba-root-")
+            os.environ["MAMBA_ROOT_PREFIX"] = MAMBA_ROOT_PREFIX
+        return MAMBA_ROOT_PREFIX
 
 
 def reset_conda_pkgs_dir() -> None:
     """Clear the fake conda packages directory.  This is used only by testing"""
     global CONDA_PKGS_DIRS
     global MAMBA_ROOT_PREFIX
+    global PERSISTENT_PKGS_DIR
+    global _PERSISTENT_PKGS_DIR_USER_LOCK
     CONDA_PKGS_DIRS = None
     MAMBA_ROOT_PREFIX = None
+    PERSISTENT_PKGS_DIR = None
+    if _PERSISTENT_PKGS_DIR_USER_LOCK is not None:
+        _PERSISTENT_PKGS_DIR_USER_LOCK.release()
+        _PERSISTENT_PKGS_DIR_USER_LOCK = None
     if "CONDA_PKGS_DIRS" in os.environ:
         del os.environ["CONDA_PKGS_DIRS"]
     if "MAMBA_ROOT_PREFIX" in os.environ:
@@ -1,22 +1,42 @@
+import io
 import pathlib
 
 from collections import defaultdict
 from collections.abc import Collection, Mapping, Sequence
 from textwrap import dedent
+from typing import Any, TextIO
 
 import yaml
 
+from packaging.utils import NormalizedName
+
+from conda_lock.lockfile.decode import (
+    decode_lockfile_v1,
+    load_yaml,
+    select_platforms,
+)
+from conda_lock.lockfile.parsed_cache import (
+    LockfileKey,
+    load_parsed_lockfile,
+    read_lockfile,
+    store_parsed_lockfile,
+)
 from conda_lock.lockfile.v1.models import Lockfile as LockfileV1
 from conda_lock.lockfile.v2prelim.models import (
     LockedDependency,
     Lockfile,
     MetadataOption,
-    lockfile_v1_to_v2,
 )
-from conda_lock.lookup import conda_name_to_pypi_name
+from conda_lock.lookup import conda_name_to_pypi_name, conda_names_to_pypi_names
 from conda_lock.models.lock_spec import Dependency
 
 
+try:
+    from yaml import CDumper
+except ImportError:  # PyYAML was built without libyaml
+    CDumper = None  # type: ignore[assignment,misc]
+
+
 class MissingLockfileVersion(ValueError):
     pass
 
@@ -55,6 +75,21 @@ def _truncate_main_category(
                 target.categories = {"main"}
 
 
+def _conda_names(
+    planned: Mapping[str, list[LockedDependency] | LockedDependency],
+) -> set[str]:
+    """Collect the names of the planned conda packages and of their dependencies"""
+    names: set[str] = set()
+    for planned_items in planned.values():
+        if not isinstance(planned_items, list):
+            planned_items = [planned_items]
+        for item in planned_items:
+            if item.manager == "conda":
+                names.add(item.name)
+                names.update(item.dependencies)
+    return names
+
+
 def apply_categories(
     *,
     requested: dict[str, Dependency],
@@ -94,11 +129,21 @@ def apply_categories(
             not in deps
         ]
 
+    # The tree walk below converts the same conda names many times, so convert all
+    # of them at once.
+    pypi_names: dict[str, NormalizedName] = (
+        conda_names_to_pypi_names(_conda_names(planned), mapping_url=mapping_url)
+        if convert_to_pip_names
+        else {}
+    )
+
     def dep_name(*, manager: str, dep: str, mapping_url: str) -> str:
         # If we operate on lists of pip names and this is a conda dependency, we
         # convert the name to a pip name.
         if convert_to_pip_names and manager == "conda":
-            return conda_name_to_pypi_name(dep, mapping_url=mapping_url)
+            return pypi_names.get(dep) or conda_name_to_pypi_name(
+                dep, mapping_url=mapping_url
+            )
         return dep
 
     for name, request in requested.items():
@@ -165,15 +210,60 @@ def apply_categories(
     _truncate_main_category(planned)
 
 
-def parse_conda_lock_file(path: pathlib.Path) -> Lockfile:
+def parse_conda_lock_file(
+    path: pathlib.Path,
+    *,
+    use_cache: bool = False,
+    platforms: Collection[str] | None = None,
+) -> Lockfile:
+    """Parse and validate a lockfile.
+
+    With `use_cache`, the result is cached in the user cache directory, and later
+    parses of the unchanged lockfile are loaded from there.
+
+    With `platforms`, only the packages of these platforms are loaded. The entries
+    of other platforms are dropped before they are decoded, so they are neither
+    validated nor turned into models. The metadata still lists all platforms.
+    """
     if not path.exists():
         raise FileNotFoundError(f"{path} not found")
 
-    with path.open() as f:
-        content = yaml.safe_load(f)
+    if not use_cache:
+        with path.open() as f:
+            content = load_yaml(f)
+        if platforms is not None:
+            select_platforms(content, platforms)
+        return _decode_conda_lock_file(path, content)
+
+    raw_content, key = read_lockfile(path)
+    lockfile = load_parsed_lockfile(path, key)
+    if lockfile is None:
+        lockfile = parse_and_cache_conda_lock_file(path, raw_content, key)
+    if platforms is not None:
+        lockfile.package = [p for p in lockfile.package if p.platform in platforms]
+    return lockfile
+
+
+def parse_and_cache_conda_lock_file(
+    path: pathlib.Path, raw_content: bytes, key: LockfileKey
+) -> Lockfile:
+    """Parse and validate the contents of a lockfile, and cache the result.
+
+    `raw_content` and `key` are what `read_lockfile` returned for `path`, so that a
+    lockfile whose cached parse is outdated is not read again.
+    """
+    # Decode like `path.open()` would.
+    content = load_yaml(io.TextIOWrapper(io.BytesIO(raw_content)))
+    # The whole lockfile is cached, so that it serves any platform.
+    lockfile = _decode_conda_lock_file(path, content)
+    store_parsed_lockfile(path, key, lockfile)
+    return lockfile
+
+
+def _decode_conda_lock_file(path: pathlib.Path, content: Any) -> Lockfile:
     version = content.pop("version", None)
     if version == 1:
-        lockfile = lockfile_v1_to_v2(LockfileV1.model_validate(content))
+        lockfile = decode_lockfile_v1(content)
     elif version == 2:
         lockfile = Lockfile.model_validate(content)
     elif version is None:
@@ -246,5 +336,53 @@ def write_conda_lock_file(
                     conda-lock {metadata_flags}{" ".join("-f " + path for path in content.metadata.sources)} --lockfile {path.name}
                 """
             )
-        output = content.to_v1().dict_for_output()
-        yaml.dump(output, stream=f, sort_keys=False)
+        _dump_lockfile(content, f)
+
+
+def _dump_lockfile(content: Lockfile, f: TextIO) -> None:
+    """Write the v1 representation of a lockfile, one package at a time.
+
+    The output is the same as that of
+    `yaml.dump(content.to_v1().dict_for_output(), sort_keys=False)`, but the whole
+    document is never held in memory. The entries of a block sequence are emitted
+    independently of each other, so they can be dumped separately.
+    """
+    header = LockfileV1(package=[], metadata=content.metadata).dict_for_output()
+    if not content.package:
+        _dump_yaml(header, f)
+        return
+    del header["package"]
+    _dump_yaml(header, f)
+    f.write("package:\n")
+    for package in content.package:
+        entries = [entry.dict_for_output() for entry in package.to_v1()]
+        if entries:
+            _dump_yaml(entries, f)
+
+
+def _dump_yaml(data: Any, f: TextIO) -> None:
+    """Like `yaml.dump(data, stream=f, sort_keys=False)`, but faster if possible.
+
+    The emitter of libyaml wraps long double-quoted scalars differently from that of
+    PyYAML, and these are used for strings with non-ASCII or non-printable
+    characters. It is only used if there are no such strings in `data`.
+    """
+    dumper = (
+        CDumper
+        if CDumper is not None and _has_only_printable_ascii(data)
+        else yaml.Dumper
+    )
+    yaml.dump(data, stream=f, sort_keys=False, Dumper=dumper)
+
+
+def _has_only_printable_ascii(data: Any) -> bool:
+    if isinstance(data, str):
+        return data.isascii() and data.isprintable()
+    if isinstance(data, dict):
+        return all(
+            _has_only_printable_ascii(key) and _has_only_printable_ascii(value)
+            for key, value in data.items()
+        )
+    if isinstance(data, list):
+        return all(_has_only_printable_ascii(item) for item in data)
+    return True
@@ -0,0 +1,167 @@
+"""Fast loading of lockfiles.
+
+Lockfiles of large environments contain many thousands of package entries. Parsing
+them with the pure-Python YAML loader and validating every entry with pydantic takes
+seconds. This module parses with libyaml when it is available, and checks the
+package entries against the schema of `LockedDependency` directly, building the
+models without validating them a second time. Anything the decoder does not
+recognize as valid is handed to pydantic, so that invalid lockfiles give the same
+errors as before.
+"""
+
+from collections import defaultdict
+from collections.abc import Collection
+from typing import IO, Any
+
+import yaml
+
+from conda_lock.lockfile.v1.models import (
+    DependencySource,
+    HashModel,
+    LockKey,
+    LockMeta,
+)
+from conda_lock.lockfile.v1.models import LockedDependency as LockedDependencyV1
+from conda_lock.lockfile.v1.models import Lockfile as LockfileV1
+from conda_lock.lockfile.v2prelim.models import (
+    LockedDependency,
+    Lockfile,
+    lockfile_v1_to_v2,
+)
+
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML was built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+
+_V1_FIELDS = frozenset(LockedDependencyV1.model_fields)
+_V1_REQUIRED_FIELDS = frozenset(
+    name
+    for name, field in LockedDependencyV1.model_fields.items()
+    if field.is_required()
+)
+
+
+def load_yaml(stream: str | bytes | IO[str]) -> Any:
+    """Like `yaml.safe_load`, but with libyaml if it is available."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def select_platforms(content: Any, platforms: Collection[str]) -> None:
+    """Drop the package entries of other platforms from the parsed contents of a
+    lockfile.
+
+    Entries without a valid platform are kept, so that validation reports them.
+    """
+    if type(content) is not dict or type(content.get("package")) is not list:
+        return
+    content["package"] = [
+        entry
+        for entry in content["package"]
+        if type(entry) is not dict
+        or type(entry.get("platform")) is not str
+        or entry["platform"] in platforms
+    ]
+
+
+def _is_optional_str(value: Any) -> bool:
+    return value is None or type(value) is str
+
+
+def _is_valid_hash(value: Any, manager: str) -> bool:
+    return (
+        type(value) is dict
+        and value.keys() <= {"md5", "sha256"}
+        and all(_is_optional_str(v) for v in value.values())
+        and (manager != "conda" or type(value.get("md5")) is str)
+    )
+
+
+def _is_valid_source(value: Any) -> bool:
+    return value is None or (
+        type(value) is dict
+        and value.keys() == {"type", "url"}
+        and value["type"] == "url"
+        and type(value["url"]) is str
+    )
+
+
+def _is_valid_dependencies(value: Any) -> bool:
+    return type(value) is dict and all(
+        type(name) is str and type(spec) is str for name, spec in value.items()
+    )
+
+
+def _is_valid_entry(entry: Any) -> bool:
+    """Check a package entry of a v1 lockfile like `LockedDependencyV1` would.
+
+    Only entries that pydantic accepts without coercing any value pass.
+    """
+    if type(entry) is not dict or not (
+        _V1_REQUIRED_FIELDS <= entry.keys() <= _V1_FIELDS
+    ):
+        return False
+    return (
+        type(entry["name"]) is str
+        and type(entry["version"]) is str
+        and entry["manager"] in ("conda", "pip")
+        and type(entry["platform"]) is str
+        and type(entry["url"]) is str
+        and entry["url"] != ""
+        and _is_valid_hash(entry["hash"], entry["manager"])
+        and _is_valid_dependencies(entry.get("dependencies", {}))
+        and _is_valid_source(entry.get("source"))
+        and _is_optional_str(entry.get("build"))
+        and type(entry.get("category", "main")) is str
+        and type(entry["optional"]) is bool
+    )
+
+
+def _locked_dependency(entry: dict[str, Any], categories: set[str]) -> LockedDependency:
+    source = entry.get("source")
+    # All fields are passed, like in `_locked_dependency_v1_to_v2`.
+    return LockedDependency.model_construct(
+        name=entry["name"],
+        version=entry["version"],
+        manager=entry["manager"],
+        platform=entry["platform"],
+        dependencies=entry.get("dependencies", {}),
+        url=entry["url"],
+        hash=HashModel.model_construct(**entry["hash"]),
+        categories=categories,
+        source=None if source is None else DependencySource.model_construct(**source),
+        build=entry.get("build"),
+    )
+
+
+def decode_lockfile_v1(content: Any) -> Lockfile:
+    """Decode the parsed contents of a v1 lockfile, without its `version`.
+
+    This is equivalent to `lockfile_v1_to_v2(LockfileV1.model_validate(content))`.
+    """
+    if not (
+        type(content) is dict
+        and content.keys() == {"metadata", "package"}
+        and type(content["package"]) is list
+        and all(_is_valid_entry(entry) for entry in content["package"])
+    ):
+        return lockfile_v1_to_v2(LockfileV1.model_validate(content))
+
+    entries_for_key: dict[LockKey, list[dict[str, Any]]] = defaultdict(list)
+    for entry in content["package"]:
+        key = LockKey(entry["manager"], entry["name"], entry["platform"])
+        entries_for_key[key].append(entry)
+
+    package = []
+    for entries in entries_for_key.values():
+        categories = {entry.get("category", "main") for entry in entries}
+        if len(categories) != len(entries):
+            # Let the generic conversion report the duplicate entries.
+            return lockfile_v1_to_v2(LockfileV1.model_validate(content))
+        package.append(_locked_dependency(entries[0], categories))
+
+    return Lockfile.model_construct(
+        package=package, metadata=LockMeta.model_validate(content["metadata"])
+    )
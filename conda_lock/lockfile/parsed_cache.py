@@ -0,0 +1,166 @@
+"""Cache of parsed lockfiles.
+
+Commands like `conda-lock install` and `conda-lock render` are often run many times
+on the same lockfile, e.g. in CI matrices, and parse and validate it every time.
+This module keeps the parsed `Lockfile` of each lockfile path in the user cache
+directory, serialized as JSON, which pydantic validates much faster than the YAML
+lockfile can be parsed.
+
+A cache file starts with a header holding the size, modification time and sha256
+hash of the lockfile it was made from, followed by the version of conda-lock. A
+cache file is only used if all of these match. The lockfile is read only once: its
+contents are hashed to look up the cache, and parsed if the cache is outdated.
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import threading
+
+from pathlib import Path
+from typing import NamedTuple
+
+from platformdirs import user_cache_path
+from pydantic import ValidationError
+
+from conda_lock.lockfile.v2prelim.models import Lockfile
+from conda_lock.lookup_cache import (
+    CLEAR_CACHE_AFTER_SECONDS,
+    clear_old_files_from_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+PARSED_LOCKFILE_MAGIC = b"CLLOCKPC"
+PARSED_LOCKFILE_FORMAT_VERSION = 1
+"""Bump this whenever the layout of the cache files changes."""
+
+_HEADER = struct.Struct("<8sIQQ32sI")
+
+
+class LockfileKey(NamedTuple):
+    """Identifies the contents of a lockfile"""
+
+    size: int
+    mtime_ns: int
+    sha256: bytes
+
+
+def _conda_lock_version() -> str:
+    # Imported here since the package imports this module before setting it.
+    from conda_lock import __version__
+
+    return __version__
+
+
+def _default_cache_dir() -> Path:
+    return user_cache_path("conda-lock", appauthor=False) / "cache" / "parsed-lockfiles"
+
+
+def parsed_lockfile_path(path: Path, cache_dir: Path | None = None) -> Path:
+    """Return the path of the cache file for the lockfile at `path`."""
+    cache = cache_dir or _default_cache_dir()
+    path_hash = hashlib.sha256(str(path.resolve()).encode()).hexdigest()
+    return cache / f"{path_hash}.bin"
+
+
+def lockfile_key(content: bytes, stat: os.stat_result) -> LockfileKey:
+    """Return the key of a lockfile from its contents and the result of `stat`."""
+    return LockfileKey(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=hashlib.sha256(content).digest(),
+    )
+
+
+def read_lockfile(path: Path) -> tuple[bytes, LockfileKey]:
+    """Read a lockfile, returning its contents and its key."""
+    stat = path.stat()
+    content = path.read_bytes()
+    return content, lockfile_key(content, stat)
+
+
+def _read_current_payload(
+    path: Path, key: LockfileKey, cache_path: Path
+) -> bytes | None:
+    """Return the serialized lockfile in `cache_path` if it matches `key`."""
+    try:
+        with cache_path.open("rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, format_version, size, mtime_ns, sha256, version_length = (
+                _HEADER.unpack(header)
+            )
+            if (
+                magic != PARSED_LOCKFILE_MAGIC
+                or format_version != PARSED_LOCKFILE_FORMAT_VERSION
+                or LockfileKey(size, mtime_ns, sha256) != key
+                or f.read(version_length).decode() != _conda_lock_version()
+            ):
+                logger.debug(f"Cached parse of {path} is outdated")
+                return None
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        logger.debug(f"Ignoring unreadable cached parse {cache_path}: {e}")
+        return None
+
+
+def load_parsed_lockfile(
+    path: Path, key: LockfileKey, *, cache_dir: Path | None = None
+) -> Lockfile | None:
+    """Return the cached parse of the lockfile at `path`, if it matches `key`."""
+    cache_path = parsed_lockfile_path(path, cache_dir)
+    payload = _read_current_payload(path, key, cache_path)
+    if payload is None:
+        return None
+    try:
+        lockfile = Lockfile.model_validate_json(payload)
+    except ValidationError as e:
+        logger.debug(f"Ignoring invalid cached parse {cache_path}: {e}")
+        return None
+    logger.debug(f"Using cached parse of {path}")
+    return lockfile
+
+
+def store_parsed_lockfile(
+    path: Path,
+    key: LockfileKey,
+    lockfile: Lockfile,
+    *,
+    cache_dir: Path | None = None,
+) -> None:
+    """Cache the parse of a lockfile, ignoring errors since it is only a cache."""
+    cache_path = parsed_lockfile_path(path, cache_dir)
+    encoded_version = _conda_lock_version().encode()
+    content = b"".join(
+        [
+            _HEADER.pack(
+                PARSED_LOCKFILE_MAGIC,
+                PARSED_LOCKFILE_FORMAT_VERSION,
+                key.size,
+                key.mtime_ns,
+                key.sha256,
+                len(encoded_version),
+            ),
+            encoded_version,
+            lockfile.model_dump_json().encode(),
+        ]
+    )
+    tmp_path = cache_path.with_name(
+        f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Lockfiles at paths that are no longer used leave their entries behind.
+        clear_old_files_from_cache(
+            cache_path.parent, max_age_seconds=CLEAR_CACHE_AFTER_SECONDS
+        )
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Failed to cache the parse of {path}: {e}")
@@ -153,6 +153,10 @@ class LockedDependency(BaseLockedDependency):
     category: str = "main"
     optional: bool
 
+    def dict_for_output(self) -> dict[str, Any]:
+        """Convert the package entry to a dictionary that can be written to a file."""
+        return self.model_dump(by_alias=True, exclude_unset=True, exclude_none=True)
+
 
 class MetadataOption(enum.Enum):
     TimeStamp = "timestamp"
@@ -393,10 +397,7 @@ class Lockfile(StrictModel):
                     by_alias=True, exclude_unset=True, exclude_none=True
                 )
             ),
-            "package": [
-                package.model_dump(by_alias=True, exclude_unset=True, exclude_none=True)
-                for package in self.package
-            ],
+            "package": [package.dict_for_output() for package in self.package],
         }
 
 
@@ -1,5 +1,6 @@
 from collections import defaultdict
-from typing import ClassVar
+from collections.abc import Mapping, Set
+from typing import ClassVar, Literal
 
 from conda_lock.lockfile.v1.models import (
     BaseLockedDependency,
@@ -46,8 +47,15 @@ class LockedDependency(BaseLockedDependency):
         return package_entries_per_category
 
 
+SortOrder = Literal["topological", "alphabetical"]
+
+
 class Lockfile(StrictModel):
     version: ClassVar[int] = 2
+    # Remembers the order the packages were last sorted in, together with the
+    # packages and their dependencies at that time, to skip sorting them again.
+    # As a slot it is neither a field nor compared or copied.
+    __slots__ = ("_sort_state",)
 
     package: list[LockedDependency]
     metadata: LockMeta
@@ -82,64 +90,83 @@ class Lockfile(StrictModel):
 
         # Resort the conda packages topologically
         final_package = self._toposort(package)
-        return Lockfile(package=final_package, metadata=self.metadata | other.metadata)
+        merged = Lockfile(
+            package=final_package, metadata=self.metadata | other.metadata
+        )
+        merged._mark_sorted("topological")
+        return merged
+
+    def _sort_fingerprint(self) -> tuple[tuple[LockKey, tuple[str, ...]], ...]:
+        """The parts of the packages that determine their order when sorted."""
+        return tuple((p.key(), tuple(p.dependencies)) for p in self.package)
+
+    def _mark_sorted(self, order: SortOrder) -> None:
+        self._sort_state = (order, self._sort_fingerprint())
+
+    def _is_sorted(self, order: SortOrder) -> bool:
+        """Check that the packages have not changed since they were sorted."""
+        state = getattr(self, "_sort_state", None)
+        return (
+            state is not None
+            and state[0] == order
+            and state[1] == self._sort_fingerprint()
+        )
 
     def toposort_inplace(self) -> None:
+        if self._is_sorted("topological"):
+            return
         self.package = self._toposort(self.package)
+        self._mark_sorted("topological")
 
     def alphasort_inplace(self) -> None:
+        if self._is_sorted("alphabetical"):
+            return
         # Sort the packages themselves by key (conda/pip, name, platform)
         self.package.sort(key=lambda d: d.key())
         for p in self.package:
             # Also ensure that the dependencies of each package are sorted
             # <https://github.com/conda/conda-lock/pull/654#issuecomment-2198453427>
-            p.dependencies = {
-                name: spec for name, spec in sorted(p.dependencies.items())
-            }
+            names = list(p.dependencies)
+            if names != sorted(names):
+                p.dependencies = {
+                    name: spec for name, spec in sorted(p.dependencies.items())
+                }
+        self._mark_sorted("alphabetical")
 
     def filter_virtual_packages_inplace(self) -> None:
+        # Removing packages keeps the others in alphabetical, but not necessarily
+        # in topological order.
+        alphasorted = self._is_sorted("alphabetical")
         self.package = [
             p
             for p in self.package
             if not (p.manager == "conda" and p.name.startswith("__"))
         ]
+        if alphasorted:
+            self._mark_sorted("alphabetical")
 
     @staticmethod
     def _toposort(package: list[LockedDependency]) -> list[LockedDependency]:
-        platforms = {d.platform for d in package}
+        # Group the packages by platform and manager in a single pass
+        groups: dict[tuple[str, str], dict[str, LockedDependency]] = defaultdict(dict)
+        for d in package:
+            groups[d.platform, d.manager][d.name] = d
 
         # Resort the conda packages topologically
         final_package: list[LockedDependency] = []
-        for platform in sorted(platforms):
-            from conda_lock.interfaces.vendored_conda import toposort
-
+        for platform in sorted({platform for platform, _ in groups}):
             # Add the remaining non-conda packages in the order in which they appeared.
             # Order the pip packages topologically ordered (might be not 100% perfect if they depend on
             # other conda packages, but good enough
             for manager in ["conda", "pip"]:
-                lookup = defaultdict(set)
-                packages: dict[str, LockedDependency] = {}
-
-                for d in package:
-                    if d.platform != platform:
-                        continue
-
-                    if d.manager != manager:
-                        continue
-
-                    lookup[d.name] = set(d.dependencies)
-                    packages[d.name] = d
-
-                ordered = toposort(lookup)
-                for package_name in ordered:
+                packages = groups.get((platform, manager), {})
+                lookup = {name: set(d.dependencies) for name, d in packages.items()}
+                for package_name in toposorted_names(lookup):
                     # since we could have a pure dep in here, that does not have a package
                     # eg a pip package that depends on a conda package (the conda package will not be in this list)
                     dep = packages.get(package_name)
-                    if dep is None:
-                        continue
-                    if dep.manager != manager:
-                        continue
-                    final_package.append(dep)
+                    if dep is not None:
+                        final_package.append(dep)
 
         return final_package
 
@@ -157,6 +184,45 @@ class Lockfile(StrictModel):
         )
 
 
+def toposorted_names(dependencies: Mapping[str, Set[str]]) -> list[str]:
+    """Order names topologically, in the same order as conda's `toposort`.
+
+    The names are emitted in rounds. Each round emits, sorted alphabetically, the
+    names whose dependencies were all emitted in earlier rounds. A cycle is broken
+    by emitting the remaining name with the fewest unmet dependencies on its own.
+    Unlike conda's implementation, which scans all remaining names in every round,
+    this takes linear time apart from sorting the rounds.
+    """
+    graph = {name: set(deps) - {name} for name, deps in dependencies.items()}
+    if "python" in graph:
+        # Like conda, always install python before pip
+        graph["python"].discard("pip")
+    dependents: dict[str, list[str]] = defaultdict(list)
+    unmet: dict[str, int] = {}
+    for name, deps in graph.items():
+        unmet[name] = len(deps)
+        for dep in deps:
+            dependents[dep].append(name)
+            unmet.setdefault(dep, len(graph.get(dep, ())))
+
+    ordered: list[str] = []
+    ready = sorted(name for name, count in unmet.items() if count == 0)
+    while unmet:
+        if not ready:
+            ready = [min(unmet, key=lambda name: (unmet[name], name))]
+        next_ready = []
+        for name in ready:
+            ordered.append(name)
+            del unmet[name]
+            for dependent in dependents[name]:
+                if dependent in unmet:
+                    unmet[dependent] -= 1
+                    if unmet[dependent] == 0:
+                        next_ready.append(dependent)
+        ready = sorted(next_ready)
+    return ordered
+
+
 def _locked_dependency_v1_to_v2(
     package_entries_per_category: list[LockedDependencyV1],
 ) -> LockedDependency:
@@ -2,14 +2,21 @@ import json
 import logging
 import time
 
+from collections.abc import Iterable
 from functools import cache
 from pathlib import Path
-from typing import TypedDict
 
 from packaging.utils import NormalizedName
 from packaging.utils import canonicalize_name as canonicalize_pypi_name
+from platformdirs import user_cache_path
 
-from conda_lock.lookup_cache import cached_download_file
+from conda_lock.lookup_cache import cached_download_path, cached_filename_for_url
+from conda_lock.mapping_index import (
+    MappingIndex,
+    build_mapping_index,
+    load_mapping_index,
+    store_mapping_index,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -17,24 +24,35 @@ logger = logging.getLogger(__name__)
 DEFAULT_MAPPING_URL = "https://raw.githubusercontent.com/regro/cf-graph-countyfair/master/mappings/pypi/grayskull_pypi_mapping.json"
 
 
-class MappingEntry(TypedDict):
-    conda_name: str
-    # legacy field, generally not used by anything anymore
-    conda_forge: str
-    pypi_name: NormalizedName
+def _mapping_index_path(mapping_url: str) -> Path:
+    """Return the path of the index of a mapping, next to its cached download."""
+    cache = user_cache_path("conda-lock", appauthor=False) / "cache" / "pypi-mapping"
+    return cache / f"{Path(cached_filename_for_url(mapping_url)).stem}.index"
 
 
-@cache
-def _get_pypi_lookup(mapping_url: str) -> dict[NormalizedName, MappingEntry]:
+def _mapping_source(mapping_url: str) -> tuple[Path, str]:
+    """Return the path of a mapping and a validator that changes with its contents.
+
+    The validator is derived from cheap metadata, so that an up-to-date index can be
+    used without reading the mapping: the manifest entry of the cached download of
+    a remote mapping, or the size and modification time of a local one.
+    """
     url = mapping_url
     if url.startswith("http://") or url.startswith("https://"):
-        content = cached_download_file(url, cache_subdir_name="pypi-mapping")
-    else:
-        if url.startswith("file://"):
-            path = url[len("file://") :]
-        else:
-            path = url
-        content = Path(path).read_bytes()
+        # The mapping changes slowly, so don't wait for a check for updates.
+        path, entry = cached_download_path(
+            url, cache_subdir_name="pypi-mapping", stale_while_revalidate=True
+        )
+        return path, f"{entry['size']}-{entry['mtime']}-{entry['etag']}"
+    if url.startswith("file://"):
+        url = url[len("file://") :]
+    path = Path(url)
+    stat = path.stat()
+    return path, f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _parse_mapping(url: str, content: bytes) -> tuple[dict[str, str], dict[str, str]]:
+    """Parse a mapping into normalized PyPI -> conda and conda -> PyPI maps."""
     logger.debug("Parsing PyPI mapping")
     load_start = time.monotonic()
     if url.endswith(".json"):
@@ -49,9 +67,31 @@ def _get_pypi_lookup(mapping_url: str) -> dict[NormalizedName, MappingEntry]:
     # lowercase and kebabcase the pypi names
     assert lookup is not None
     lookup = {canonicalize_pypi_name(k): v for k, v in lookup.items()}
-    for v in lookup.values():
-        v["pypi_name"] = canonicalize_pypi_name(v["pypi_name"])
-    return lookup
+    conda_names: dict[str, str] = {}
+    pypi_names: dict[str, str] = {}
+    for pypi_name, entry in lookup.items():
+        conda_name = entry.get("conda_name") or entry.get("conda_forge")
+        if conda_name is not None:
+            conda_names[pypi_name] = conda_name
+        if entry.get("conda_name") is not None:
+            pypi_names[entry["conda_name"]] = canonicalize_pypi_name(entry["pypi_name"])
+    return conda_names, pypi_names
+
+
+@cache
+def _get_mapping_index(mapping_url: str) -> MappingIndex:
+    """Load the index of a mapping, building it if the mapping has changed."""
+    path, validator = _mapping_source(mapping_url)
+    index_path = _mapping_index_path(mapping_url)
+    index = load_mapping_index(index_path, validator=validator)
+    if index is not None:
+        logger.debug(f"Using PyPI mapping index {index_path}")
+        return index
+    conda_names, pypi_names = _parse_mapping(mapping_url, path.read_bytes())
+    index_content = build_mapping_index(conda_names, pypi_names, validator=validator)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    store_mapping_index(index_path, index_content)
+    return MappingIndex(index_content)
 
 
 def pypi_name_to_conda_name(name: str, mapping_url: str) -> str:
@@ -65,30 +105,39 @@ def pypi_name_to_conda_name(name: str, mapping_url: str) -> str:
     'zpfqzvrj'
     """
     cname = canonicalize_pypi_name(name)
-    lookup = _get_pypi_lookup(mapping_url)
-    if cname in lookup:
-        entry = lookup[cname]
-        res = entry.get("conda_name") or entry.get("conda_forge")
-        if res is not None:
-            return res
+    res = _get_mapping_index(mapping_url).conda_name(cname)
+    if res is not None:
+        return res
 
     logger.debug(f"Could not find conda name for {cname}. Assuming identity.")
     return cname
 
 
 @cache
-def _get_conda_lookup(mapping_url: str) -> dict[str, MappingEntry]:
+def _get_conda_lookup(mapping_url: str) -> dict[str, str]:
     """
     Reverse grayskull name mapping to map conda names onto PyPI
     """
-    return {
-        record["conda_name"]: record
-        for record in _get_pypi_lookup(mapping_url).values()
-    }
+    return _get_mapping_index(mapping_url).pypi_names()
 
 
 def conda_name_to_pypi_name(name: str, mapping_url: str) -> NormalizedName:
-    """return the pypi name for a conda package"""
-    lookup = _get_conda_lookup(mapping_url=mapping_url)
+    """return the pypi name for a conda package
+
+    The name is looked up in the index of the mapping, without loading all of it.
+    Use `conda_names_to_pypi_names` to convert many names.
+    """
     cname = canonicalize_pypi_name(name)
-    return lookup.get(cname, {"pypi_name": cname})["pypi_name"]
+    return NormalizedName(_get_mapping_index(mapping_url).pypi_name(cname) or cname)
+
+
+def conda_names_to_pypi_names(
+    names: Iterable[str], mapping_url: str
+) -> dict[str, NormalizedName]:
+    """return the pypi names for many conda packages, keyed by their conda names"""
+    lookup = _get_conda_lookup(mapping_url=mapping_url)
+    result: dict[str, NormalizedName] = {}
+    for name in names:
+        cname = canonicalize_pypi_name(name)
+        result[name] = NormalizedName(lookup.get(cname, cname))
+    return result
@@ -1,9 +1,15 @@
 import hashlib
+import json
 import logging
+import os
 import re
+import threading
 
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TypedDict
 
 import requests
 
@@ -20,6 +26,22 @@ CLEAR_CACHE_AFTER_SECONDS = 60 * 60 * 24 * 2  # 2 days
 DONT_CHECK_IF_NEWER_THAN_SECONDS = 60 * 5  # 5 minutes
 """If the cached file is newer than this, just use it without checking for updates."""
 
+CLEAR_CACHE_INTERVAL_SECONDS = 60 * 60  # 1 hour
+"""Old files are removed from a cache directory at most this often."""
+
+CLEARED_STAMP_FILENAME = ".last-cleared"
+"""The modification time of this file records when the cache was last cleared."""
+
+CACHE_LAYOUT_VERSION = 2
+"""Bump this whenever the layout of a cache directory changes.
+
+The files of the current layout are kept in a `v<CACHE_LAYOUT_VERSION>` subdirectory.
+Files of older layouts are eventually removed as old files.
+"""
+
+MANIFEST_FILENAME = "manifest.json"
+"""Records the URL, size, download time and ETag of every cached file."""
+
 TIMESTAMP_RESOLUTION_SECONDS = 5
 """Some filesystems may have a limited resolution for file modification times.
 We tolerate a small amount of timestamp inaccuracy that might lead to files having
@@ -27,6 +49,14 @@ a negative age.
 """
 
 
+class ManifestEntry(TypedDict):
+    url: str
+    size: int
+    mtime: float
+    """When the file was downloaded, as a POSIX timestamp"""
+    etag: str | None
+
+
 def uncached_download_file(url: str) -> bytes:
     """The simple equivalent to cached_download_file."""
     res = requests.get(url, headers={"User-Agent": "conda-lock"})
@@ -41,6 +71,7 @@ def cached_download_file(
     cache_root: Path | None = None,
     max_age_seconds: float = CLEAR_CACHE_AFTER_SECONDS,
     dont_check_if_newer_than_seconds: float = DONT_CHECK_IF_NEWER_THAN_SECONDS,
+    stale_while_revalidate: bool = False,
 ) -> bytes:
     """Download a file and cache it in the user cache directory.
 
@@ -48,16 +79,31 @@ def cached_download_file(
     If the file is not cached, download it and cache the contents
     and the ETag.
 
+    With `stale_while_revalidate`, a cached file that is due for a check for
+    updates is returned immediately, and checked in a background thread. The
+    updated file is then used from the next call on.
+
     Protect against multiple processes downloading the same file.
     """
-    if cache_root is None:
-        cache_root = user_cache_path("conda-lock", appauthor=False)
-    cache = cache_root / "cache" / cache_subdir_name
-    cache.mkdir(parents=True, exist_ok=True)
-    clear_old_files_from_cache(cache, max_age_seconds=max_age_seconds)
-
-    destination = cache / cached_filename_for_url(url)
+    cache = _prepare_cache_dir(
+        cache_root, cache_subdir_name, max_age_seconds=max_age_seconds
+    )
+    destination = cached_path_for_url(cache, url)
     destination_lock = destination.with_suffix(".lock")
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    if stale_while_revalidate:
+        # Files are replaced atomically, so this is safe without the lock.
+        entry = read_manifest(cache).get(destination.stem)
+        content = _read_cached_file(destination, entry)
+        if content is not None:
+            if not _is_cached_file_fresh(entry, dont_check_if_newer_than_seconds):
+                _revalidate_in_background(
+                    url,
+                    cache=cache,
+                    dont_check_if_newer_than_seconds=dont_check_if_newer_than_seconds,
+                )
+            return content
 
     # Wait for any other process to finish downloading the file.
     # This way we can use the result from the current download without
@@ -79,33 +125,152 @@ def cached_download_file(
             )
 
 
+def cached_download_path(
+    url: str,
+    *,
+    cache_subdir_name: str,
+    cache_root: Path | None = None,
+    max_age_seconds: float = CLEAR_CACHE_AFTER_SECONDS,
+    dont_check_if_newer_than_seconds: float = DONT_CHECK_IF_NEWER_THAN_SECONDS,
+    stale_while_revalidate: bool = False,
+) -> tuple[Path, ManifestEntry]:
+    """Like `cached_download_file`, but return the path and the manifest entry of
+    the cached file instead of its contents.
+
+    A cached file that can be used without downloading it is not read, so callers
+    that derive something from the file can check whether it changed from the
+    manifest entry alone.
+    """
+    cache = _prepare_cache_dir(
+        cache_root, cache_subdir_name, max_age_seconds=max_age_seconds
+    )
+    destination = cached_path_for_url(cache, url)
+    entry = read_manifest(cache).get(destination.stem)
+    if _has_cached_file(destination, entry):
+        assert entry is not None
+        if _is_cached_file_fresh(entry, dont_check_if_newer_than_seconds):
+            return destination, entry
+        if stale_while_revalidate:
+            _revalidate_in_background(
+                url,
+                cache=cache,
+                dont_check_if_newer_than_seconds=dont_check_if_newer_than_seconds,
+            )
+            return destination, entry
+    cached_download_file(
+        url,
+        cache_subdir_name=cache_subdir_name,
+        cache_root=cache_root,
+        max_age_seconds=max_age_seconds,
+        dont_check_if_newer_than_seconds=dont_check_if_newer_than_seconds,
+    )
+    return destination, read_manifest(cache)[destination.stem]
+
+
+def _prepare_cache_dir(
+    cache_root: Path | None, cache_subdir_name: str, *, max_age_seconds: float
+) -> Path:
+    """Create a cache directory and clear old files from it if that is due."""
+    if cache_root is None:
+        cache_root = user_cache_path("conda-lock", appauthor=False)
+    cache = cache_root / "cache" / cache_subdir_name
+    cache.mkdir(parents=True, exist_ok=True)
+    _clear_old_files_if_due(cache, max_age_seconds=max_age_seconds)
+    return cache
+
+
+_REVALIDATING: set[Path] = set()
+_REVALIDATING_LOCK = threading.Lock()
+
+
+def _revalidate_in_background(
+    url: str, *, cache: Path, dont_check_if_newer_than_seconds: float
+) -> None:
+    """Check a cached file for updates in a background thread.
+
+    Nothing is done if the file is already being checked by this or (judging by
+    its lock) another process. Errors are logged, the cached file is kept.
+    """
+    destination = cached_path_for_url(cache, url)
+    with _REVALIDATING_LOCK:
+        if destination in _REVALIDATING:
+            return
+        _REVALIDATING.add(destination)
+
+    def revalidate() -> None:
+        destination_lock = destination.with_suffix(".lock")
+        try:
+            with FileLock(str(destination_lock), timeout=0):
+                _download_to_or_read_from_cache(
+                    url,
+                    cache=cache,
+                    dont_check_if_newer_than_seconds=dont_check_if_newer_than_seconds,
+                )
+        except Timeout:
+            logger.debug(f"{url} is already being downloaded by another process")
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Failed to check {url} for updates, using cached file: {e}")
+        finally:
+            with _REVALIDATING_LOCK:
+                _REVALIDATING.discard(destination)
+
+    logger.debug(f"Checking {url} for updates in the background")
+    # A daemon thread does not delay the exit of conda-lock. Since the cached files
+    # are replaced atomically, an interrupted download leaves them intact.
+    threading.Thread(target=revalidate, daemon=True).start()
+
+
 def _is_cached_file_fresh(
-    destination: Path, dont_check_if_newer_than_seconds: float
+    entry: ManifestEntry | None, dont_check_if_newer_than_seconds: float
 ) -> bool:
-    """Check if a cached file exists and is fresh enough to use without checking.
+    """Check if a cached file is fresh enough to use without checking.
 
     (In this context, "checking" means that later, beyond the scope of this function,
     we will query the server with an ETag to see if the file has changed or if we
     get a 304 Not Modified response.)
 
-    A file is "fresh" if its age is positive and less than
-    `dont_check_if_newer_than_seconds`.
+    A file is "fresh" if the age recorded in its manifest entry is positive and less
+    than `dont_check_if_newer_than_seconds`.
 
     Returns True if the file is fresh, False otherwise.
     """
-    if destination.is_file():
-        age_seconds = get_age_seconds(destination)
-        if age_seconds is None:
-            raise RuntimeError(f"Error checking age of {destination}")
-        if 0 <= age_seconds < dont_check_if_newer_than_seconds:
-            logger.debug(
-                f"Using cached file {destination} of age {age_seconds}s "
-                f"without checking for updates"
-            )
-            return True
+    if entry is None:
+        return False
+    age_seconds = _age_seconds(entry["mtime"])
+    if 0 <= age_seconds < dont_check_if_newer_than_seconds:
+        logger.debug(
+            f"Using cached file for {entry['url']} of age {age_seconds}s "
+            f"without checking for updates"
+        )
+        return True
     return False
 
 
+def _has_cached_file(destination: Path, entry: ManifestEntry | None) -> bool:
+    """Check if a cached file exists and matches its manifest entry, without reading
+    it."""
+    if entry is None:
+        return False
+    try:
+        return destination.stat().st_size == entry["size"]
+    except FileNotFoundError:
+        return False
+
+
+def _read_cached_file(destination: Path, entry: ManifestEntry | None) -> bytes | None:
+    """Return the contents of a cached file if it matches its manifest entry."""
+    if entry is None:
+        return None
+    try:
+        content = destination.read_bytes()
+    except FileNotFoundError:
+        return None
+    if len(content) != entry["size"]:
+        logger.debug(f"Size of {destination} does not match the cache manifest")
+        return None
+    return content
+
+
 def _download_to_or_read_from_cache(
     url: str, *, cache: Path, dont_check_if_newer_than_seconds: float
 ) -> bytes:
@@ -118,50 +283,91 @@ def _download_to_or_read_from_cache(
     return the cached contents. Otherwise we pass the ETag from the last download
     in the headers to avoid downloading the file if it hasn't changed remotely.
     """
-    destination = cache / cached_filename_for_url(url)
-    destination_etag = destination.with_suffix(".etag")
+    destination = cached_path_for_url(cache, url)
+    entry = read_manifest(cache).get(destination.stem)
+    cached_content = _read_cached_file(destination, entry)
     request_headers = {"User-Agent": "conda-lock"}
-    # Return the contents immediately if the file is fresh
-    if _is_cached_file_fresh(destination, dont_check_if_newer_than_seconds):
-        return destination.read_bytes()
-    # Add the ETag from the last download, if it exists, to the headers.
-    # The ETag is used to avoid downloading the file if it hasn't changed remotely.
-    # Otherwise, download the file and cache the contents and ETag.
-    if destination.is_file() and destination_etag.is_file():
-        old_etag = destination_etag.read_text().strip()
-        request_headers["If-None-Match"] = old_etag
+    if cached_content is not None and entry is not None:
+        # Return the contents immediately if the file is fresh
+        if _is_cached_file_fresh(entry, dont_check_if_newer_than_seconds):
+            return cached_content
+        # The ETag is used to avoid downloading the file if it hasn't changed remotely.
+        if entry["etag"] is not None:
+            request_headers["If-None-Match"] = entry["etag"]
     # Download the file and cache the result.
     logger.debug(f"Requesting {url}")
     res = requests.get(url, headers=request_headers)
-    if res.status_code == 304:
+    if res.status_code == 304 and cached_content is not None:
         logger.debug(f"{url} has not changed since last download, using {destination}")
+        return cached_content
+    res.raise_for_status()
+    if "ETag" in res.headers:
+        etag = res.headers["ETag"]
     else:
-        res.raise_for_status()
-        destination.write_bytes(res.content)
-        if "ETag" in res.headers:
-            destination_etag.write_text(res.headers["ETag"])
-        else:
-            logger.warning("No ETag in response headers")
+        etag = None
+        logger.warning("No ETag in response headers")
+    _write_atomically(destination, res.content)
+    with _updating_manifest(cache) as manifest:
+        manifest[destination.stem] = ManifestEntry(
+            url=url,
+            size=len(res.content),
+            mtime=datetime.now().timestamp(),
+            etag=etag,
+        )
     logger.debug(f"Downloaded {url} to {destination}")
-    return destination.read_bytes()
+    return res.content
+
+
+def read_manifest(cache: Path) -> dict[str, ManifestEntry]:
+    """Return the manifest of a cache directory, keyed by the names of the files.
+
+    The manifest is replaced atomically, so it can be read without a lock.
+    """
+    path = cache / f"v{CACHE_LAYOUT_VERSION}" / MANIFEST_FILENAME
+    try:
+        manifest = json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache manifest {path}: {e}")
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+@contextmanager
+def _updating_manifest(cache: Path) -> Iterator[dict[str, ManifestEntry]]:
+    """Lock the manifest of a cache directory and write back any changes."""
+    layout = cache / f"v{CACHE_LAYOUT_VERSION}"
+    layout.mkdir(parents=True, exist_ok=True)
+    with FileLock(str((layout / MANIFEST_FILENAME).with_suffix(".lock"))):
+        manifest = read_manifest(cache)
+        yield manifest
+        _write_atomically(layout / MANIFEST_FILENAME, json.dumps(manifest).encode())
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    """Write a file so that readers see either the old or the new contents."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
 
 
 def cached_filename_for_url(url: str) -> str:
-    """Return a filename for a URL that is probably unique to the URL.
+    """Return a filename for a URL that is unique to the URL.
 
-    The filename is a 4-character hash of the URL, followed by the extension.
+    The filename is the sha256 hash of the URL, followed by the extension.
     If the extension is not alphanumeric or too long, it is omitted.
 
     >>> cached_filename_for_url("https://example.com/foo.json")
-    'a5d7.json'
+    'a5d7ef90fad0be74673ebb4e7f4f736c8ba2af49a88e86ef8a66e5771550ff5e.json'
     >>> cached_filename_for_url("https://example.com/foo")
-    '5ea6'
+    '5ea6a25e064152eac65ba0fea013900979d850a6986ec2b134a71a7758eac94e'
     >>> cached_filename_for_url("https://example.com/foo.bär")
-    '2191'
+    '219119cb7ca87ac4f643590c27abd997cc8e705a6ce703257f2beacd41afa224'
     >>> cached_filename_for_url("https://example.com/foo.baaaaaar")
-    '1861'
+    '1861745bdb015dfd687f0938dffc24dcc5f013d30a3b1c848ca12890cb82d145'
     """
-    url_hash = hashlib.sha256(url.encode()).hexdigest()[:4]
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
     extension = url.split(".")[-1]
     if len(extension) <= 6 and re.match("^[a-zA-Z0-9]+$", extension):
         return f"{url_hash}.{extension}"
@@ -169,6 +375,61 @@ def cached_filename_for_url(url: str) -> str:
         return f"{url_hash}"
 
 
+def cached_path_for_url(cache: Path, url: str) -> Path:
+    """Return the path of the cached file of a URL within a cache directory.
+
+    The files are sharded into subdirectories by the first two characters of their
+    name, so that no single directory grows large.
+
+    >>> cached_path_for_url(Path("cache/x"), "https://example.com/foo.json").as_posix()
+    'cache/x/v2/a5/a5d7ef90fad0be74673ebb4e7f4f736c8ba2af49a88e86ef8a66e5771550ff5e.json'
+    """
+    filename = cached_filename_for_url(url)
+    return cache / f"v{CACHE_LAYOUT_VERSION}" / filename[:2] / filename
+
+
+def _clear_old_files_if_due(cache: Path, *, max_age_seconds: float) -> None:
+    """Clear old files from the cache, unless that was done recently.
+
+    Files of the current layout are found through the manifest. The top level of
+    the cache directory holds only a few files, such as those of older layouts,
+    which are cleared by their modification time.
+    """
+    stamp = cache / CLEARED_STAMP_FILENAME
+    age_seconds = get_age_seconds(stamp)
+    interval_seconds = min(CLEAR_CACHE_INTERVAL_SECONDS, max_age_seconds)
+    if age_seconds is not None and 0 <= age_seconds < interval_seconds:
+        return
+    clear_old_files_from_cache(cache, max_age_seconds=max_age_seconds)
+    clear_old_entries_from_manifest(cache, max_age_seconds=max_age_seconds)
+    stamp.touch()
+
+
+def clear_old_entries_from_manifest(cache: Path, *, max_age_seconds: float) -> None:
+    """Remove cached files whose manifest entries are older than `max_age_seconds`.
+
+    The lock files of the entries are kept, since another process may hold them.
+    """
+
+    def is_old(entry: ManifestEntry) -> bool:
+        age_seconds = _age_seconds(entry["mtime"])
+        return age_seconds < 0 or age_seconds >= max_age_seconds
+
+    if not any(is_old(entry) for entry in read_manifest(cache).values()):
+        return
+    with _updating_manifest(cache) as manifest:
+        for key, entry in list(manifest.items()):
+            if not is_old(entry):
+                continue
+            path = cached_path_for_url(cache, entry["url"])
+            try:
+                path.unlink()
+                logger.debug(f"Removed old cache file {path}")
+            except FileNotFoundError:
+                pass
+            del manifest[key]
+
+
 def clear_old_files_from_cache(cache: Path, *, max_age_seconds: float) -> None:
     """Remove files in the cache directory older than `max_age_seconds`.
 
@@ -183,6 +444,9 @@ def clear_old_files_from_cache(cache: Path, *, max_age_seconds: float) -> None:
             f"not '{cache.parent.name}'",
         )
     for file in cache.iterdir():
+        if file.is_dir():
+            # The files of the current layout are cleared through the manifest.
+            continue
         age_seconds = get_age_seconds(file)
         if age_seconds is None:
             # The file was probably already deleted.
@@ -203,9 +467,14 @@ def get_age_seconds(path: Path) -> float | None:
     as zero, which is important for the freshness check.
     """
     try:
-        raw_age = datetime.now().timestamp() - path.stat().st_mtime
+        mtime = path.stat().st_mtime
     except FileNotFoundError:
         return None
+    return _age_seconds(mtime)
+
+
+def _age_seconds(timestamp: float) -> float:
+    raw_age = datetime.now().timestamp() - timestamp
     if -TIMESTAMP_RESOLUTION_SECONDS <= raw_age < 0:
         return 0.0
     return raw_age
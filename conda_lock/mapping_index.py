@@ -0,0 +1,186 @@
+"""Compact on-disk index of the PyPI <-> conda name mapping.
+
+The mapping is a JSON or YAML document with tens of thousands of entries. Parsing it
+and normalizing every name takes a noticeable amount of time on each start of
+conda-lock. This module stores the normalized forward (PyPI -> conda) and reverse
+(conda -> PyPI) maps in a binary file that can be memory-mapped, so that later
+processes only need to read the entries they use.
+
+Layout of the file (all integers are little-endian unsigned 32 bit):
+
+- magic, format version, length of the validator, validator
+- forward table, then reverse table, each consisting of the number of records,
+  the offsets of the records in the data that follows (plus the end offset), and
+  the records themselves, sorted by key. A record is the UTF-8 encoded key and
+  value, separated by a NUL byte.
+
+The validator identifies the source document the index was built from. An index
+with a different validator or format version is ignored.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+MAPPING_INDEX_MAGIC = b"CLMAPIDX"
+MAPPING_INDEX_FORMAT_VERSION = 1
+"""Bump this whenever the layout or the normalization of the index changes."""
+
+_HEADER = struct.Struct("<8sII")
+_UINT32 = struct.Struct("<I")
+
+
+class _Table:
+    """A sorted table of records in a buffer"""
+
+    def __init__(self, buffer: bytes | mmap.mmap, offset: int):
+        (self._count,) = _UINT32.unpack_from(buffer, offset)
+        self._buffer = buffer
+        self._offsets_start = offset + _UINT32.size
+        self._data_start = self._offsets_start + (self._count + 1) * _UINT32.size
+        self.end = self._data_start + self._offset(self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, index: int) -> int:
+        (offset,) = _UINT32.unpack_from(
+            self._buffer, self._offsets_start + index * _UINT32.size
+        )
+        return offset
+
+    def _record(self, index: int) -> tuple[bytes, bytes]:
+        start = self._data_start + self._offset(index)
+        end = self._data_start + self._offset(index + 1)
+        key, _, value = self._buffer[start:end].partition(b"\0")
+        return key, value
+
+    def get(self, key: str) -> str | None:
+        """Find the value of `key` with a binary search."""
+        needle = key.encode()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record_key, value = self._record(mid)
+            if record_key < needle:
+                lo = mid + 1
+            elif record_key > needle:
+                hi = mid
+            else:
+                return value.decode()
+        return None
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        for index in range(self._count):
+            key, value = self._record(index)
+            yield key.decode(), value.decode()
+
+
+class MappingIndex:
+    """Read access to an index of the name mapping"""
+
+    def __init__(self, buffer: bytes | mmap.mmap):
+        magic, version, validator_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAPPING_INDEX_MAGIC:
+            raise ValueError("Not a mapping index")
+        if version != MAPPING_INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported mapping index version {version}")
+        validator_end = _HEADER.size + validator_length
+        self.validator = bytes(buffer[_HEADER.size : validator_end]).decode()
+        self._forward = _Table(buffer, validator_end)
+        self._reverse = _Table(buffer, self._forward.end)
+        if self._reverse.end != len(buffer):
+            raise ValueError("Truncated mapping index")
+
+    @classmethod
+    def open(cls, path: Path) -> "MappingIndex":
+        """Memory-map the index at `path`."""
+        with path.open("rb") as f:
+            # The mapping stays valid after the file is closed.
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def conda_name(self, pypi_name: str) -> str | None:
+        """Return the conda name of a normalized PyPI name."""
+        return self._forward.get(pypi_name)
+
+    def pypi_name(self, conda_name: str) -> str | None:
+        """Return the normalized PyPI name of a conda name."""
+        return self._reverse.get(conda_name)
+
+    def conda_names(self) -> dict[str, str]:
+        """Materialize the whole PyPI -> conda map."""
+        return dict(self._forward.items())
+
+    def pypi_names(self) -> dict[str, str]:
+        """Materialize the whole conda -> PyPI map."""
+        return dict(self._reverse.items())
+
+
+def _serialize_table(table: Mapping[str, str]) -> bytes:
+    records = [
+        key.encode() + b"\0" + value.encode()
+        for key, value in sorted(table.items(), key=lambda item: item[0].encode())
+    ]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    return b"".join(
+        [
+            _UINT32.pack(len(records)),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            *records,
+        ]
+    )
+
+
+def build_mapping_index(
+    conda_names: Mapping[str, str], pypi_names: Mapping[str, str], *, validator: str
+) -> bytes:
+    """Serialize the forward and reverse maps into an index."""
+    encoded_validator = validator.encode()
+    return b"".join(
+        [
+            _HEADER.pack(
+                MAPPING_INDEX_MAGIC,
+                MAPPING_INDEX_FORMAT_VERSION,
+                len(encoded_validator),
+            ),
+            encoded_validator,
+            _serialize_table(conda_names),
+            _serialize_table(pypi_names),
+        ]
+    )
+
+
+def load_mapping_index(path: Path, *, validator: str) -> MappingIndex | None:
+    """Return the index at `path` if it was built from the given source."""
+    try:
+        index = MappingIndex.open(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"Ignoring unreadable mapping index {path}: {e}")
+        return None
+    if index.validator != validator:
+        logger.debug(f"Mapping index {path} is outdated")
+        return None
+    return index
+
+
+def store_mapping_index(path: Path, content: bytes) -> None:
+    """Write an index atomically, ignoring errors since it is only a cache."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Failed to store mapping index {path}: {e}")
@@ -1,12 +1,19 @@
+import logging
 import re
 import sys
+import threading
 import warnings
 
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from posixpath import expandvars
+from types import MappingProxyType
 from typing import (
     TYPE_CHECKING,
     Literal,
+    SupportsIndex,
     cast,
 )
 from urllib.parse import urldefrag, urlsplit, urlunsplit
@@ -21,6 +28,7 @@ from conda_lock._vendor.cleo.io.null_io import NullIO
 from conda_lock._vendor.cleo.io.outputs.output import Verbosity
 from conda_lock._vendor.cleo.io.outputs.stream_output import StreamOutput
 from conda_lock._vendor.poetry.repositories.http_repository import HTTPRepository
+from conda_lock.artifact_hash_cache import cached_calculate_sha256
 from conda_lock.content_hash_types import HashableVirtualPackage
 from conda_lock.interfaces.vendored_poetry import (
     Chooser,
@@ -39,6 +47,7 @@ from conda_lock.interfaces.vendored_poetry import (
     PoetryVCSDependency,
     Pool,
     PyPiRepository,
+    SolverProblemError,
     VirtualEnv,
 )
 from conda_lock.lockfile import apply_categories
@@ -47,14 +56,17 @@ from conda_lock.lockfile.v2prelim.models import (
     HashModel,
     LockedDependency,
 )
-from conda_lock.lookup import conda_name_to_pypi_name
+from conda_lock.lookup import conda_names_to_pypi_names
 from conda_lock.models import lock_spec
 from conda_lock.models.pip_repository import PipRepository
+from conda_lock.range_support_cache import PersistentRangeSupport
 
 
 if TYPE_CHECKING:
     from packaging.tags import Tag
 
+logger = logging.getLogger(__name__)
+
 # NB: in principle these depend on the glibc on the machine creating the conda env.
 # We use tags supported by manylinux Docker images, which are likely the most common
 # in practice, see https://github.com/pypa/manylinux/blob/main/README.rst#docker-images.
@@ -65,6 +77,18 @@ MANYLINUX_TAGS = ["1", "2010", "2014", "_2_17", "_2_18", "_2_24", "_2_28"]
 # This needs to be updated periodically as new macOS versions are released.
 MACOS_VERSION = (13, 4)
 
+SUPPORTED_TAGS_CACHE_SIZE = 128
+"""Number of (Python version, platform) combinations whose supported tags are kept."""
+
+PREFETCH_MAX_WORKERS = 8
+"""Number of concurrent requests when prefetching package metadata."""
+
+PREFETCH_MAX_DEPTH = 2
+"""Prefetch the metadata of the pip requirements and of their direct dependencies."""
+
+PREFETCH_MIN_REQUIREMENTS = 2
+"""Don't prefetch for fewer pip requirements, nothing would be fetched concurrently."""
+
 
 class PlatformEnv(VirtualEnv):
     """
@@ -136,15 +160,20 @@ class PlatformEnv(VirtualEnv):
     def get_supported_tags(self) -> list["Tag"]:
         """
         Mimic the output of packaging.tags.sys_tags() on the given platform
+
+        The tags are shared with the other environments of the same Python version
+        and platforms, so they are immutable even though Poetry expects a list.
         """
-        return list(
-            cpython_tags(python_version=self._python_version, platforms=self._platforms)
-        ) + list(
-            compatible_tags(
-                python_version=self._python_version, platforms=self._platforms
-            )
+        return cast(
+            list["Tag"],
+            _get_supported_tags(self._python_version, tuple(self._platforms)),
         )
 
+    @property
+    def supported_tag_ranks(self) -> Mapping["Tag", int]:
+        """The rank of each supported tag, lower ranks being preferred"""
+        return _get_supported_tags(self._python_version, tuple(self._platforms)).ranks
+
     def get_marker_env(self) -> dict[str, str]:
         """Return the subset of info needed to match common markers"""
         result: dict[str, str] = {
@@ -162,6 +191,52 @@ class PlatformEnv(VirtualEnv):
         return result
 
 
+class RankedTags(tuple["Tag", ...]):
+    """
+    Supported tags in order of preference, with constant-time lookups
+
+    The Chooser of Poetry ranks every wheel by looking up its tags with `in` and
+    `index`, which would otherwise scan all the tags for each of them. The tags are
+    cached and shared, so they cannot be changed.
+    """
+
+    ranks: Mapping["Tag", int]
+
+    def __new__(cls, tags: Iterable["Tag"]) -> "RankedTags":
+        self = super().__new__(cls, tags)
+        ranks: dict[Tag, int] = {}
+        for rank, tag in enumerate(self):
+            ranks.setdefault(tag, rank)
+        self.ranks = MappingProxyType(ranks)
+        return self
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self.ranks
+
+    def index(self, tag: "Tag", *args: SupportsIndex) -> int:
+        rank = self.ranks.get(tag)
+        if rank is None or args:
+            return super().index(tag, *args)
+        return rank
+
+
+@lru_cache(maxsize=SUPPORTED_TAGS_CACHE_SIZE)
+def _get_supported_tags(
+    python_version: tuple[int, ...] | None, platforms: tuple[str, ...]
+) -> RankedTags:
+    """Compute the supported tags once for each Python version and set of platforms.
+
+    The platforms are determined by the conda platform and, on Linux, by the glibc
+    version.
+    """
+    return RankedTags(
+        [
+            *cpython_tags(python_version=python_version, platforms=platforms),
+            *compatible_tags(python_version=python_version, platforms=platforms),
+        ]
+    )
+
+
 def _extract_glibc_version_from_virtual_packages(
     platform_virtual_packages: dict[str, HashableVirtualPackage],
 ) -> Version | None:
@@ -502,6 +577,9 @@ def solve_pypi(
     verbose: bool = False,
     strip_auth: bool = False,
     mapping_url: str,
+    incremental_locked: dict[str, LockedDependency] | None = None,
+    pip_resolutions: "PipResolutions | None" = None,
+    pip_pools: "PipRepositoryPools | None" = None,
 ) -> dict[str, LockedDependency]:
     """
     Solve pip dependencies for the given platform
@@ -530,11 +608,33 @@ def solve_pypi(
         Print chatter from solver
     strip_auth :
         Whether to strip HTTP Basic auth from URLs.
+    incremental_locked :
+        Previous pip solution for the given platform. If given, the requirements it
+        still satisfies keep their previously locked packages, and only the other
+        requirements are resolved. If the other requirements conflict with the kept
+        packages, all requirements are resolved.
+    pip_resolutions :
+        Resolutions of other platforms to reuse if the resolution for this platform
+        would be the same.
+    pip_pools :
+        Repository pools to reuse from the platforms solved before on this thread.
 
     """
+    kept: dict[str, LockedDependency] = {}
+    root_specs = pip_specs
+    if incremental_locked:
+        specs_to_solve, kept = _split_incremental_pip_specs(
+            pip_specs, incremental_locked
+        )
+        logger.debug(
+            f"Keeping {len(kept)} previously locked pip packages for {platform}, "
+            f"resolving {sorted(specs_to_solve)}"
+        )
+        root_specs = _pin_kept_pip_specs(pip_specs, specs_to_solve, kept)
+
     dummy_package = PoetryProjectPackage("_dummy_package_", "0.0.0")
     dependencies: list[PoetryDependency] = [
-        get_dependency(spec) for spec in pip_specs.values()
+        get_dependency(spec) for spec in root_specs.values()
     ]
     for dep in dependencies:
         dummy_package.add_dependency(dep)
@@ -545,72 +645,114 @@ def solve_pypi(
         if isinstance(spec, lock_spec.VersionedDependency) and spec.hash
     }
 
-    pool = _prepare_repositories_pool(
-        allow_pypi_requests, pip_repositories=pip_repositories
-    )
+    if pip_pools is None:
+        pip_pools = PipRepositoryPools()
+    pool = pip_pools.get(allow_pypi_requests, pip_repositories=pip_repositories)
 
     installed: list[PoetryPackage] = []
     locked: list[PoetryPackage] = []
 
-    python_packages = dict()
-    locked_dep: LockedDependency
-    for locked_dep in conda_locked.values():
-        if locked_dep.name.startswith("__"):
-            continue
-        # ignore packages that don't depend on Python
-        if locked_dep.manager != "pip" and "python" not in locked_dep.dependencies:
-            continue
-        try:
-            pypi_name = conda_name_to_pypi_name(
-                locked_dep.name, mapping_url=mapping_url
-            ).lower()
-        except KeyError:
-            continue
-        # Prefer the Python package when its name collides with the Conda package
-        # for the underlying library, e.g. python-xxhash (pypi: xxhash) over xxhash
-        # (pypi: no equivalent)
-        if pypi_name not in python_packages or pypi_name != locked_dep.name:
-            python_packages[pypi_name] = locked_dep.version
+    conda_pypi_names = conda_names_to_pypi_names(conda_locked, mapping_url=mapping_url)
+    python_packages = _conda_python_packages(conda_locked, conda_pypi_names)
     # treat conda packages as both locked and installed
     for name, version in python_packages.items():
         for repo in (locked, installed):
             repo.append(PoetryPackage(name=name, version=version))
+    # treat kept pip packages as installed, so that the solver only replaces them
+    # if a changed requirement conflicts with them
+    for kept_dep in kept.values():
+        for repo in (locked, installed):
+            repo.append(get_package(kept_dep))
     # treat pip packages as locked only
     for spec in pip_locked.values():
         locked.append(get_package(spec))
 
-    if verbose:
-        input = ArgvInput()
-        input.set_stream(sys.stdin)
-        io = IO(input, StreamOutput(sys.stdout), StreamOutput(sys.stderr))
-        VERY_VERBOSE: Verbosity = Verbosity.VERY_VERBOSE  # pyright: ignore[reportAssignmentType]
-        io.set_verbosity(VERY_VERBOSE)
-    else:
-        io = NullIO()
-    s = PoetrySolver(
-        dummy_package,
-        pool=pool,
-        installed=installed,
-        locked=locked,
-        # ConsoleIO type is expected, but NullIO may be given:
-        io=io,  # pyright: ignore
+    env = PlatformEnv(
+        python_version=python_version,
+        platform=platform,
+        platform_virtual_packages=platform_virtual_packages,
     )
     to_update = list(
         {canonicalize_name(spec.name) for spec in pip_locked.values()}.intersection(
             use_latest
         )
     )
-    env = PlatformEnv(
-        python_version=python_version,
-        platform=platform,
-        platform_virtual_packages=platform_virtual_packages,
-    )
-    # find platform-specific solution (e.g. dependencies conditioned on markers)
-    with s.use_environment(env):
-        result = s.solve(use_latest=to_update)
+
+    def resolve() -> list[Operation]:
+        _prefetch_release_info(
+            partial(pip_pools.get, allow_pypi_requests, pip_repositories),
+            dependencies,
+            executor=pip_pools.prefetch_executor(),
+            env=env,
+            locked_versions={
+                **python_packages,
+                **{
+                    canonicalize_name(dep.name): dep.version
+                    for dep in pip_locked.values()
+                },
+            },
+        )
+
+        if verbose:
+            input = ArgvInput()
+            input.set_stream(sys.stdin)
+            io = IO(input, StreamOutput(sys.stdout), StreamOutput(sys.stderr))
+            VERY_VERBOSE: Verbosity = Verbosity.VERY_VERBOSE  # pyright: ignore[reportAssignmentType]
+            io.set_verbosity(VERY_VERBOSE)
+        else:
+            io = NullIO()
+        s = PoetrySolver(
+            dummy_package,
+            pool=pool,
+            installed=installed,
+            locked=locked,
+            # ConsoleIO type is expected, but NullIO may be given:
+            io=io,  # pyright: ignore
+        )
+        # find platform-specific solution (e.g. dependencies conditioned on markers)
+        with s.use_environment(env):
+            result = s.solve(use_latest=to_update)
+        return result.calculate_operations(with_uninstalls=False)
+
+    try:
+        if pip_resolutions is None:
+            operations = resolve()
+        else:
+            # The distributions are chosen for each platform below.
+            resolution_key = (
+                tuple(sorted(env.get_marker_env().items())),
+                tuple(spec.model_dump_json() for spec in root_specs.values()),
+                tuple((p.name, p.full_pretty_version, p.source_url) for p in installed),
+                tuple((p.name, p.full_pretty_version, p.source_url) for p in locked),
+                tuple(sorted(to_update)),
+            )
+            operations = pip_resolutions.get(resolution_key, platform, resolve)
+    except SolverProblemError:
+        if not kept:
+            raise
+        logger.info(
+            f"The changed pip requirements conflict with the kept packages, "
+            f"resolving all pip requirements for {platform}"
+        )
+        return solve_pypi(
+            pip_specs=pip_specs,
+            use_latest=use_latest,
+            pip_locked=pip_locked,
+            conda_locked=conda_locked,
+            python_version=python_version,
+            platform=platform,
+            platform_virtual_packages=platform_virtual_packages,
+            pip_repositories=pip_repositories,
+            allow_pypi_requests=allow_pypi_requests,
+            verbose=verbose,
+            strip_auth=strip_auth,
+            mapping_url=mapping_url,
+            pip_resolutions=pip_resolutions,
+            pip_pools=pip_pools,
+        )
 
     requirements = get_requirements(
-        result.calculate_operations(with_uninstalls=False),
+        operations,
         platform,
         pool,
         env,
@@ -618,6 +760,14 @@ def solve_pypi(
         strip_auth=strip_auth,
         lock_spec_hashes=lock_spec_hashes,
     )
+    # Packages kept from the previous solution are skipped by the solver unless it
+    # had to change them. Their categories are recomputed below.
+    solved = {canonicalize_name(dep.name) for dep in requirements}
+    requirements = [
+        dep.model_copy(update={"categories": set()})
+        for name, dep in kept.items()
+        if name not in solved
+    ] + requirements
 
     # use PyPI names of conda packages to walking the dependency tree and propagate
     # categories from explicit to transitive dependencies
@@ -633,7 +783,7 @@ def solve_pypi(
     # is essentially a dictionary of:
     #  - pip package name -> list of LockedDependency that are needed for this package
     for conda_name, locked_dep in conda_locked.items():
-        pypi_name = conda_name_to_pypi_name(conda_name, mapping_url=mapping_url)
+        pypi_name = conda_pypi_names[conda_name]
         if pypi_name in planned:
             planned[pypi_name].append(locked_dep)
         else:
@@ -649,6 +799,196 @@ def solve_pypi(
     return {dep.name: dep for dep in requirements}
 
 
+def _conda_python_packages(
+    conda_locked: dict[str, LockedDependency], conda_pypi_names: Mapping[str, str]
+) -> dict[str, str]:
+    """Return the versions of the Python packages in the conda solution by PyPI name"""
+    python_packages: dict[str, str] = {}
+    for conda_name, locked_dep in conda_locked.items():
+        if locked_dep.name.startswith("__"):
+            continue
+        # ignore packages that don't depend on Python
+        if locked_dep.manager != "pip" and "python" not in locked_dep.dependencies:
+            continue
+        pypi_name = conda_pypi_names[conda_name].lower()
+        # Prefer the Python package when its name collides with the Conda package
+        # for the underlying library, e.g. python-xxhash (pypi: xxhash) over xxhash
+        # (pypi: no equivalent)
+        if pypi_name not in python_packages or pypi_name != locked_dep.name:
+            python_packages[pypi_name] = locked_dep.version
+    return python_packages
+
+
+class PipResolutions:
+    """
+    Pip resolutions of the platforms of one lock, for reuse by the other platforms
+
+    The pip solver only sees the platform through its marker environment; which
+    distribution is installed on the platform is chosen afterwards. Platforms that
+    share the marker environment and the other inputs of the solver, e.g. linux-64
+    and linux-aarch64, therefore get the same resolution, and only the first of them
+    needs to be resolved.
+    """
+
+    def __init__(self) -> None:
+        self._resolutions: dict[Hashable, tuple[str, list[Operation]]] = {}
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: Hashable, platform: str, resolve: Callable[[], list[Operation]]
+    ) -> list[Operation]:
+        """Run `resolve`, unless a resolution with the same key is already known.
+
+        Concurrent solves with the same key wait for each other.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self._resolutions:
+                resolved_platform, operations = self._resolutions[key]
+                logger.info(
+                    f"Reusing the pip resolution of {resolved_platform} for {platform}"
+                )
+                return operations
+            operations = resolve()
+            self._resolutions[key] = (platform, operations)
+            return operations
+
+
+def _split_incremental_pip_specs(
+    pip_specs: dict[str, lock_spec.Dependency],
+    previous: dict[str, LockedDependency],
+) -> tuple[dict[str, lock_spec.Dependency], dict[str, LockedDependency]]:
+    """
+    Split pip requirements into those that need to be resolved and those that don't
+
+    A plain versioned requirement is unchanged if the version that was previously
+    locked for it still satisfies it. Such requirements and everything they depend
+    on in the previous solution are kept as they are. All other requirements, like
+    new ones, ones with extras, and direct references, have to be resolved.
+
+    Returns the requirements to resolve, and the previously locked packages to keep
+    by their canonical names.
+    """
+    previous_by_name = {canonicalize_name(dep.name): dep for dep in previous.values()}
+    to_solve: dict[str, lock_spec.Dependency] = {}
+    todo: list[LockedDependency] = []
+    for name, spec in pip_specs.items():
+        locked_dep = previous_by_name.get(canonicalize_name(spec.name))
+        if (
+            isinstance(spec, lock_spec.VersionedDependency)
+            and not spec.extras
+            and locked_dep is not None
+            and locked_dep.source is None
+            and get_dependency(spec).constraint.allows(get_package(locked_dep).version)
+        ):
+            todo.append(locked_dep)
+        else:
+            to_solve[name] = spec
+
+    kept: dict[str, LockedDependency] = {}
+    while todo:
+        locked_dep = todo.pop()
+        key = canonicalize_name(locked_dep.name)
+        if key in kept:
+            continue
+        kept[key] = locked_dep
+        for dep_name in locked_dep.dependencies:
+            child = previous_by_name.get(canonicalize_name(dep_name))
+            if child is not None:
+                todo.append(child)
+    return to_solve, kept
+
+
+def _pin_kept_pip_specs(
+    pip_specs: dict[str, lock_spec.Dependency],
+    specs_to_solve: dict[str, lock_spec.Dependency],
+    kept: dict[str, LockedDependency],
+) -> dict[str, lock_spec.Dependency]:
+    """
+    Pin the requirements that are not resolved again to their kept versions
+
+    The kept packages are also passed to the solver as installed, but only the
+    requirements of the root package are enforced. Pinning them there makes the
+    solver keep the dependencies they share with the other requirements compatible
+    with them.
+    """
+    return {
+        name: (
+            spec
+            if name in specs_to_solve
+            else spec.model_copy(
+                update={"version": f"=={kept[canonicalize_name(spec.name)].version}"}
+            )
+        )
+        for name, spec in pip_specs.items()
+    }
+
+
+def _prefetch_release_info(
+    get_pool: Callable[[], Pool],
+    dependencies: list[PoetryDependency],
+    *,
+    executor: Executor,
+    env: PlatformEnv,
+    locked_versions: dict[str, str],
+) -> None:
+    """
+    Concurrently fetch the package metadata that the solver is likely to ask for
+
+    The solver fetches the package pages and the metadata of each candidate one
+    request at a time. Here the pages of the requirements are fetched concurrently,
+    together with the metadata of their preferred candidate: the locked version if
+    there is one, otherwise the latest version. The same is done for the
+    dependencies of those candidates, up to `PREFETCH_MAX_DEPTH` levels.
+
+    Poetry's repositories are not thread-safe, so every worker thread of `executor`
+    fetches through its own pool from `get_pool`, not through the pool of the solver.
+    What they fetch ends up in Poetry's on-disk caches of package pages and release
+    information, where the solver mostly finds it.
+
+    Any error is ignored, the solver will run into it again and report it.
+    """
+    marker_env = env.get_marker_env()
+
+    def prefetch(dependency: PoetryDependency) -> list[PoetryDependency]:
+        try:
+            pool = get_pool()
+            packages = pool.find_packages(dependency)
+            if not packages:
+                return []
+            locked_version = locked_versions.get(dependency.name)
+            candidates = [
+                p for p in packages if str(p.version) == locked_version
+            ] or packages
+            candidate = max(candidates, key=lambda p: p.version)
+            package = pool.package(
+                candidate.name,
+                candidate.version,
+                repository_name=candidate.source_reference,
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.debug(f"Failed to prefetch metadata for {dependency}: {e}")
+            return []
+        return [
+            dep
+            for dep in package.requires
+            if not dep.in_extras and dep.marker.validate(marker_env)
+        ]
+
+    seen: set[str] = set()
+    level = [dep for dep in dependencies if not dep.is_direct_origin()]
+    if len(level) < PREFETCH_MIN_REQUIREMENTS:
+        return
+    for _ in range(PREFETCH_MAX_DEPTH):
+        level = [dep for dep in level if dep.name not in seen]
+        if not level:
+            break
+        seen.update(dep.name for dep in level)
+        level = [dep for deps in executor.map(prefetch, level) for dep in deps]
+
+
 def _prepare_repositories_pool(
     allow_pypi_requests: bool, pip_repositories: list[PipRepository] | None = None
 ) -> Pool:
@@ -683,9 +1023,77 @@ def _prepare_repositories_pool(
         repos.append(source)
     if allow_pypi_requests:
         repos.append(PyPiRepository())
+    # Remember across runs which hosts support range requests for lazy wheels
+    range_support = PersistentRangeSupport()
+    for repo in repos:
+        repo._supports_range_requests = range_support
+        # Do not download artifacts again just to hash them
+        repo.calculate_sha256 = partial(  # type: ignore[method-assign]
+            cached_calculate_sha256, repo.calculate_sha256, head=repo.session.head
+        )
     return Pool(repositories=[*repos])
 
 
+class PipRepositoryPools:
+    """
+    Pools of pip repositories for the platforms of one lock
+
+    Poetry's repositories, with their HTTP sessions and the package pages they have
+    fetched, are not thread-safe, so each thread gets its own pools. The platforms
+    that are solved one after another on a thread share the pages already fetched,
+    while concurrent solves only share Poetry's on-disk caches. The pools are
+    dropped together with this object at the end of the lock, so that a long-lived
+    process does not keep serving outdated pages.
+
+    The threads that prefetch package metadata also live as long as this object, so
+    that their pools serve all the platforms of the lock. `close` stops them.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._prefetch_executor: ThreadPoolExecutor | None = None
+
+    def prefetch_executor(self) -> ThreadPoolExecutor:
+        """Return the executor whose threads prefetch package metadata."""
+        with self._lock:
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ThreadPoolExecutor(
+                    max_workers=PREFETCH_MAX_WORKERS,
+                    thread_name_prefix="conda-lock-prefetch",
+                )
+            return self._prefetch_executor
+
+    def close(self) -> None:
+        """Stop the prefetch threads, dropping their pools."""
+        with self._lock:
+            executor, self._prefetch_executor = self._prefetch_executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def get(
+        self,
+        allow_pypi_requests: bool,
+        pip_repositories: list[PipRepository] | None = None,
+    ) -> Pool:
+        """Like `_prepare_repositories_pool`, but reuse the pools of this thread."""
+        pools: dict[Hashable, Pool] = self._local.__dict__.setdefault("pools", {})
+        # The credentials are expanded from environment variables when the pool is
+        # made.
+        key = (
+            allow_pypi_requests,
+            tuple(
+                (repository, str(repository.expanded_basic_auth))
+                for repository in pip_repositories or []
+            ),
+        )
+        if key not in pools:
+            pools[key] = _prepare_repositories_pool(
+                allow_pypi_requests, pip_repositories=pip_repositories
+            )
+        return pools[key]
+
+
 def _strip_auth(url: str) -> str:
     """Strip HTTP Basic authentication from a URL."""
     parts = urlsplit(url, allow_fragments=True)
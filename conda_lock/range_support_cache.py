@@ -0,0 +1,96 @@
+"""Persistent memory of which pip index hosts support HTTP range requests.
+
+Poetry reads the metadata of a wheel lazily with HTTP range requests when the host
+supports them, and otherwise downloads the whole wheel. Each `HTTPRepository`
+tracks per host whether range requests work, but only in memory, so every
+conda-lock process has to find out again. This module stores those verdicts in the
+user cache directory. (The extracted metadata itself is already persisted by
+Poetry's release cache.)
+"""
+
+import json
+import logging
+import os
+import time
+
+from pathlib import Path
+
+from filelock import FileLock
+from platformdirs import user_cache_path
+
+
+logger = logging.getLogger(__name__)
+
+RANGE_SUPPORT_MAX_AGE_SECONDS = 60 * 60 * 24 * 7  # 7 days
+"""Verdicts older than this are forgotten, since servers may change."""
+
+RANGE_SUPPORT_MAX_ENTRIES = 1024
+"""Only the most recent verdicts for this many hosts are kept."""
+
+
+def _default_cache_path() -> Path:
+    return (
+        user_cache_path("conda-lock", appauthor=False)
+        / "cache"
+        / "range-support"
+        / "range-support.json"
+    )
+
+
+class PersistentRangeSupport(dict[str, bool]):
+    """A drop-in for `HTTPRepository._supports_range_requests` that is kept on disk.
+
+    It is loaded from `path` when created, and every changed verdict is written back
+    immediately, so that concurrent conda-lock processes share what they learn.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        super().__init__()
+        self._path = _default_cache_path() if path is None else path
+        now = time.time()
+        for netloc, (supported, timestamp) in self._load().items():
+            if 0 <= now - timestamp < RANGE_SUPPORT_MAX_AGE_SECONDS:
+                super().__setitem__(netloc, supported)
+
+    def __setitem__(self, netloc: str, supported: bool) -> None:
+        changed = self.get(netloc) != supported
+        super().__setitem__(netloc, supported)
+        if changed:
+            self._store(netloc, supported)
+
+    def setdefault(self, netloc: str, default: bool) -> bool:
+        if netloc not in self:
+            self[netloc] = default
+        return self[netloc]
+
+    def _load(self) -> dict[str, tuple[bool, float]]:
+        """Load the verdicts and the times they were stored."""
+        try:
+            entries = json.loads(self._path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable range support cache {self._path}: {e}")
+            return {}
+        result: dict[str, tuple[bool, float]] = {}
+        if isinstance(entries, dict):
+            for netloc, entry in entries.items():
+                match entry:
+                    case [bool(supported), float(timestamp) | int(timestamp)]:
+                        result[netloc] = (supported, timestamp)
+        return result
+
+    def _store(self, netloc: str, supported: bool) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(str(self._path.with_suffix(".lock"))):
+                entries = self._load()
+                entries[netloc] = (supported, time.time())
+                newest = sorted(entries.items(), key=lambda e: e[1][1], reverse=True)
+                temp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+                temp_path.write_text(
+                    json.dumps(dict(newest[:RANGE_SUPPORT_MAX_ENTRIES]))
+                )
+                os.replace(temp_path, self._path)
+        except OSError as e:
+            logger.debug(f"Failed to update range support cache {self._path}: {e}")
@@ -0,0 +1,224 @@
+"""In-process conda solver backend based on py-rattler.
+
+The default solver backend runs conda, mamba or micromamba in a subprocess and
+parses the JSON of a dry-run install from its stdout. This backend instead loads
+the repodata and solves with the libsolv-derived solver of
+[rattler](https://github.com/conda/rattler) in the current process, and returns
+the same `DryRunInstall` structure.
+
+py-rattler is an optional dependency which can be installed with
+`pip install conda-lock[rattler]`.
+
+The platforms of one lock share a `RattlerSession`, which keeps the repodata that
+rattler has loaded in memory. The repodata of each channel subdir, including the
+`noarch` subdir shared by all platforms, is therefore loaded only once per lock,
+and later locks load it from the rattler cache directory instead of downloading it.
+"""
+
+import asyncio
+import logging
+import pathlib
+import threading
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from conda_lock.lockfile.v2prelim.models import LockedDependency
+from conda_lock.models.channel import Channel
+from conda_lock.models.dry_run_install import DryRunInstall, FetchAction, LinkAction
+
+
+if TYPE_CHECKING:
+    import rattler
+
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_rattler() -> None:
+    try:
+        import rattler  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "The rattler solver backend requires py-rattler. "
+            "Install it with `pip install conda-lock[rattler]` or "
+            "`conda install -c conda-forge py-rattler`."
+        ) from e
+
+
+def _rattler_sources(channels: Sequence[Channel]) -> list[str]:
+    sources = []
+    for channel in channels:
+        if channel.url == "defaults":
+            raise ValueError(
+                "The 'defaults' channel depends on the conda configuration and is "
+                "not supported by the rattler solver backend. "
+                "Specify the channels explicitly instead."
+            )
+        sources.append(channel.env_replaced_url())
+    return sources
+
+
+def _to_fetch_action(record: "rattler.RepoDataRecord") -> FetchAction:
+    return FetchAction(
+        channel=f"{str(record.channel or '').rstrip('/')}/{record.subdir}",
+        constrains=list(record.constrains),
+        depends=list(record.depends),
+        fn=record.file_name,
+        md5=record.md5.hex() if record.md5 else "",
+        sha256=record.sha256.hex() if record.sha256 else None,
+        name=record.name.source,
+        subdir=record.subdir,
+        timestamp=int(record.timestamp.timestamp() * 1000) if record.timestamp else 0,
+        url=record.url,
+        version=str(record.version),
+    )
+
+
+def _to_link_action(record: "rattler.RepoDataRecord") -> LinkAction:
+    base_url = str(record.channel or "").rstrip("/")
+    dist_name = record.file_name
+    for extension in (".tar.bz2", ".conda"):
+        dist_name = dist_name.removesuffix(extension)
+    return LinkAction(
+        base_url=base_url,
+        channel=urlsplit(base_url).path.strip("/"),
+        dist_name=dist_name,
+        name=record.name.source,
+        platform=record.subdir,
+        version=str(record.version),
+    )
+
+
+class RattlerSession:
+    """
+    Repodata loaded by rattler for the platforms of one lock
+
+    The session wraps a single `rattler.Gateway`, which caches the repodata records
+    it has loaded in memory, and can be used by concurrent solves. The records are
+    dropped together with this object at the end of the lock, so that a long-lived
+    process does not keep solving against outdated repodata.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._gateway: rattler.Gateway | None = None
+
+    def gateway(self) -> "rattler.Gateway":
+        """Return the gateway of this session, creating it on first use."""
+        import rattler
+
+        with self._lock:
+            if self._gateway is None:
+                self._gateway = rattler.Gateway()
+            return self._gateway
+
+    def close(self) -> None:
+        """Drop the repodata loaded in this session."""
+        with self._lock:
+            self._gateway = None
+
+
+async def _solve(
+    *,
+    gateway: "rattler.Gateway",
+    sources: list[str],
+    specs: list[str],
+    platform: str,
+    locked: Sequence[LockedDependency],
+) -> list["rattler.RepoDataRecord"]:
+    import rattler
+
+    platforms = [rattler.Subdir(platform), rattler.Subdir("noarch")]
+    locked_records = []
+    if locked:
+        # Prefer the previously locked builds. Use the records from the channels
+        # rather than reconstructing them from the lockfile, which only keeps a
+        # merged subset of the package metadata.
+        locked_file_names = {
+            pathlib.PurePosixPath(urlsplit(dep.url).path).name for dep in locked
+        }
+        query_result = await gateway.query(
+            sources, platforms, [dep.name for dep in locked], recursive=False
+        )
+        locked_records = [
+            record
+            for records in query_result
+            for record in records
+            if record.file_name in locked_file_names
+        ]
+    return await rattler.solve(
+        sources,
+        specs,
+        gateway=gateway,
+        platforms=platforms,
+        locked_packages=locked_records,
+        # The virtual packages are provided by the fake virtual package channel.
+        virtual_packages=[],
+    )
+
+
+def solve_specs_in_process(
+    channels: Sequence[Channel],
+    specs: list[str],
+    platform: str,
+    locked: dict[str, LockedDependency] | None = None,
+    update: list[str] | None = None,
+    session: RattlerSession | None = None,
+) -> DryRunInstall:
+    """
+    Solve (or update a previous solution of) conda specifications in-process
+
+    Parameters
+    ----------
+    channels :
+        Channels to query
+    specs :
+        Conda package specifications
+    platform :
+        Target platform
+    locked :
+        Previous solution for the given platform (conda packages only)
+    update :
+        Names of packages to update to the latest version compatible with specs.
+        All other packages of the previous solution are kept if possible.
+    session :
+        Session whose repodata is reused. Without one, the repodata is loaded
+        for this solve only.
+
+    Unlike the subprocess backend, which installs the previous solution into a fake
+    environment and pins the packages that are not updated, the packages of the
+    previous solution are only passed to rattler as `locked_packages`. Rattler
+    prefers these builds, but may still replace any of them if the updated packages
+    require it.
+    """
+    _ensure_rattler()
+    from rattler.exceptions import SolverError
+
+    keep = [
+        dep for name, dep in (locked or {}).items() if name not in set(update or [])
+    ]
+    if session is None:
+        session = RattlerSession()
+    logger.info("%s using specs %s", platform, specs)
+    try:
+        records = asyncio.run(
+            _solve(
+                gateway=session.gateway(),
+                sources=_rattler_sources(channels),
+                specs=specs,
+                platform=platform,
+                locked=keep,
+            )
+        )
+    except SolverError as e:
+        raise RuntimeError(
+            f"Could not lock the environment for platform {platform}: {e}"
+        ) from e
+    return {
+        "actions": {
+            "FETCH": [_to_fetch_action(record) for record in records],
+            "LINK": [_to_link_action(record) for record in records],
+        }
+    }
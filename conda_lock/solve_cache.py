@@ -0,0 +1,214 @@
+"""Persistent cache of per-platform solve results.
+
+Solving is by far the most expensive part of locking. When the same lock
+specification is locked again (in another repository, on another CI branch, ...)
+and the channels have not changed in the meantime, the solver would arrive at
+the same result. This module stores the locked dependencies of each solve in the
+user cache directory so that such a solve can be skipped entirely.
+
+An entry is keyed on the content hash of the platform (see `content_hash.py`),
+the state of the repodata of each channel, and the other inputs that influence
+the solution. The state of the repodata is determined from the `ETag` or
+`Last-Modified` headers of the channel's `repodata.json`. If it cannot be
+determined for some channel, the result is not cached. Solves that involve pip
+dependencies are not cached either, since the state of the pip indexes is not
+captured by the key.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from filelock import FileLock, Timeout
+from platformdirs import user_cache_path
+from pydantic import ValidationError
+
+from conda_lock.lockfile.v2prelim.models import LockedDependency
+from conda_lock.models.channel import Channel
+
+
+logger = logging.getLogger(__name__)
+
+SOLVE_CACHE_MAX_SIZE_BYTES = 256 * 1024 * 1024  # 256 MiB
+"""When the cache grows beyond this size, the least recently used entries are
+removed."""
+
+SOLVE_CACHE_FORMAT_VERSION = 1
+"""Bump this whenever the format of the cached entries changes."""
+
+DEFAULT_CHANNEL_ALIAS = "https://conda.anaconda.org"
+
+
+def _default_cache_dir() -> Path:
+    return user_cache_path("conda-lock", appauthor=False) / "cache" / "solves"
+
+
+def _channel_base_url(channel: Channel) -> str | None:
+    """Return the base URL of a channel, or None if it cannot be determined.
+
+    >>> _channel_base_url(Channel.from_string("conda-forge"))
+    'https://conda.anaconda.org/conda-forge'
+    >>> _channel_base_url(Channel.from_string("https://example.com/channel/"))
+    'https://example.com/channel'
+    >>> _channel_base_url(Channel.from_string("defaults")) is None
+    True
+    """
+    url = channel.env_replaced_url()
+    if url == "defaults":
+        # This is a multi-channel whose members depend on the conda configuration.
+        return None
+    if "://" not in url:
+        url = f"{DEFAULT_CHANNEL_ALIAS}/{url}"
+    return url.rstrip("/")
+
+
+def _repodata_state(url: str) -> str | None:
+    """Return a string that changes whenever the repodata at `url` changes."""
+    if url.startswith("file://"):
+        try:
+            stat = Path(url[len("file://") :]).stat()
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+    try:
+        res = requests.head(
+            url,
+            headers={"User-Agent": "conda-lock"},
+            allow_redirects=True,
+            timeout=30,
+        )
+        res.raise_for_status()
+    except requests.RequestException as e:
+        logger.debug(f"Unable to determine the state of {url}: {e}")
+        return None
+    return res.headers.get("ETag") or res.headers.get("Last-Modified")
+
+
+def repodata_fingerprint(channels: Sequence[Channel], platform: str) -> str | None:
+    """Fingerprint the state of the repodata of the given channels.
+
+    Returns None if the state of any of the channels cannot be determined, in
+    which case solve results must not be cached.
+    """
+    states: list[str] = []
+    for channel in channels:
+        base_url = _channel_base_url(channel)
+        if base_url is None:
+            logger.debug(f"Unable to fingerprint the repodata of {channel.url}")
+            return None
+        for subdir in (platform, "noarch"):
+            state = _repodata_state(f"{base_url}/{subdir}/repodata.json")
+            if state is None:
+                return None
+            states.append(state)
+    return hashlib.sha256("\n".join(states).encode()).hexdigest()
+
+
+def solve_cache_key(
+    *,
+    content_hash: str,
+    channels: Sequence[Channel],
+    platform: str,
+    **inputs: Any,
+) -> str | None:
+    """Compute the cache key of a solve, or None if it should not be cached.
+
+    Additional keyword arguments are JSON-serialized into the key. They should
+    capture every input of the solve that is not covered by the content hash.
+    """
+    fingerprint = repodata_fingerprint(channels, platform)
+    if fingerprint is None:
+        return None
+    key_data = {
+        "version": SOLVE_CACHE_FORMAT_VERSION,
+        "content_hash": content_hash,
+        "platform": platform,
+        "repodata": fingerprint,
+        **inputs,
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+
+def load_cached_solve(
+    key: str, *, cache_dir: Path | None = None
+) -> list[LockedDependency] | None:
+    """Return the cached solution for the given key, if there is one."""
+    path = (cache_dir or _default_cache_dir()) / f"{key}.json"
+    try:
+        content = json.loads(path.read_text())
+        deps = [LockedDependency.model_validate(dep) for dep in content]
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.debug(f"Ignoring unreadable solve cache entry {path}: {e}")
+        return None
+    except (ValueError, ValidationError) as e:
+        logger.warning(f"Ignoring corrupt solve cache entry {path}: {e}")
+        return None
+    # Keep track of recently used entries for eviction.
+    try:
+        path.touch()
+    except OSError:
+        pass
+    logger.debug(f"Using cached solve {path}")
+    return deps
+
+
+def store_solve(
+    key: str,
+    deps: Sequence[LockedDependency],
+    *,
+    cache_dir: Path | None = None,
+    max_size_bytes: int = SOLVE_CACHE_MAX_SIZE_BYTES,
+) -> None:
+    """Store a solution in the cache and evict old entries if necessary."""
+    cache = cache_dir or _default_cache_dir()
+    path = cache / f"{key}.json"
+    content = json.dumps([dep.model_dump(mode="json") for dep in deps])
+    # Write atomically so that concurrent readers never see a partial entry.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        cache.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Failed to store solve in {path}: {e}")
+        return
+    logger.debug(f"Stored solve in {path}")
+    evict_solve_cache(cache, max_size_bytes=max_size_bytes)
+
+
+def evict_solve_cache(cache: Path, *, max_size_bytes: int) -> None:
+    """Remove the least recently used entries until the cache fits in the limit."""
+    try:
+        with FileLock(str(cache / ".evict.lock"), timeout=0):
+            entries = []
+            for path in cache.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= max_size_bytes:
+                    break
+                try:
+                    path.unlink()
+                    logger.debug(f"Evicted solve cache entry {path}")
+                except FileNotFoundError:
+                    pass
+                total_size -= size
+    except Timeout:
+        # Another process is already evicting.
+        pass
+    except OSError as e:
+        logger.debug(f"Failed to evict entries from the solve cache {cache}: {e}")
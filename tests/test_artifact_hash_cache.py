@@ -0,0 +1,63 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import requests
+
+from conda_lock.artifact_hash_cache import (
+    cached_calculate_sha256,
+    evict_artifact_hash_cache,
+)
+from conda_lock.interfaces.vendored_poetry import Link
+
+
+def _head(headers: dict[str, str]) -> MagicMock:
+    response = MagicMock()
+    response.headers = headers
+    return MagicMock(return_value=response)
+
+
+def test_cached_calculate_sha256(tmp_path: Path) -> None:
+    link = Link("https://example.com/simple/pkg/pkg-1.0-py3-none-any.whl")
+    calculate_sha256 = MagicMock(return_value="sha256:abc")
+    head = _head({"ETag": '"1"', "Content-Length": "10"})
+
+    for _ in range(2):
+        file_hash = cached_calculate_sha256(
+            calculate_sha256, link, head=head, cache_dir=tmp_path
+        )
+        assert file_hash == "sha256:abc"
+    calculate_sha256.assert_called_once_with(link)
+
+    # The artifact changed on the server.
+    head = _head({"ETag": '"2"', "Content-Length": "10"})
+    cached_calculate_sha256(calculate_sha256, link, head=head, cache_dir=tmp_path)
+    assert calculate_sha256.call_count == 2
+
+
+def test_cached_calculate_sha256_without_validator(tmp_path: Path) -> None:
+    link = Link("https://example.com/simple/pkg/pkg-1.0-py3-none-any.whl")
+    calculate_sha256 = MagicMock(return_value="sha256:abc")
+    for head in [
+        _head({"Content-Length": "10"}),
+        MagicMock(side_effect=requests.ConnectionError()),
+    ]:
+        for _ in range(2):
+            cached_calculate_sha256(
+                calculate_sha256, link, head=head, cache_dir=tmp_path
+            )
+    assert calculate_sha256.call_count == 4
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_evict_artifact_hash_cache(tmp_path: Path) -> None:
+    link = Link("https://example.com/simple/pkg/pkg-1.0-py3-none-any.whl")
+    for etag in ["1", "2", "3"]:
+        cached_calculate_sha256(
+            lambda link: "sha256:abc",
+            link,
+            head=_head({"ETag": etag, "Content-Length": "10"}),
+            cache_dir=tmp_path,
+            max_entries=2,
+        )
+    evict_artifact_hash_cache(tmp_path, max_entries=1)
+    assert len([p for p in tmp_path.iterdir() if not p.name.startswith(".")]) == 1
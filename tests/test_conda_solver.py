@@ -1,3 +1,9 @@
+import json
+import os
+import sys
+
+from textwrap import dedent
+
 from conda_lock import conda_solver
 from conda_lock.lookup import DEFAULT_MAPPING_URL
 from conda_lock.models.channel import Channel
@@ -53,3 +59,106 @@ def test_solve_conda_merges_duplicate_dependency_specs(monkeypatch) -> None:
         )
 
         assert planned["babel"].dependencies["python"] == ">=3.10"
+
+
+def test_run_dry_run_streams_json_output() -> None:
+    script = dedent(
+        """
+        import json, sys
+        sys.stderr.write("warning\\n" * 10000)
+        print("Preamble")
+        link = [{"name": f"pkg{i}", "depends": ["python >=3.10"]} for i in range(5000)]
+        json.dump({"actions": {"FETCH": [], "LINK": link}, "success": True}, sys.stdout)
+        """
+    )
+    output = conda_solver._run_dry_run(
+        [sys.executable, "-c", script], env=dict(os.environ)
+    )
+    assert output.returncode == 0
+    assert output.result is not None
+    assert output.result["success"] is True
+    link = output.result["actions"]["LINK"]
+    assert [action["name"] for action in link] == [f"pkg{i}" for i in range(5000)]
+    assert output.stdout.startswith("Preamble")
+    assert output.stderr == "warning\n" * 10000
+
+
+def test_run_dry_run_extracts_failure_message() -> None:
+    script = dedent(
+        """
+        import json, sys
+        json.dump({"message": "nothing provides foo", "error": "..."}, sys.stdout)
+        sys.exit(1)
+        """
+    )
+    output = conda_solver._run_dry_run(
+        [sys.executable, "-c", script], env=dict(os.environ)
+    )
+    assert output.returncode == 1
+    assert output.result is not None
+    assert output.result["message"] == "nothing provides foo"
+
+    output = conda_solver._run_dry_run(
+        [sys.executable, "-c", "print('not json'); raise SystemExit(1)"],
+        env=dict(os.environ),
+    )
+    assert output.returncode == 1
+    assert output.result is None
+    assert output.stdout == "not json\n"
+
+
+def test_match_spec_parsing_is_cached() -> None:
+    conda_solver._parse_match_spec.cache_clear()
+    conda_solver._merged_version_spec.cache_clear()
+    for _ in range(3):
+        assert conda_solver._merged_version_spec(("libgcc-ng >=12",)) == ">=12"
+    assert conda_solver._parse_match_spec.cache_info().misses == 1
+    assert conda_solver._merged_version_spec.cache_info().hits == 2
+
+
+def test_get_repodata_records_scans_pkgs_dirs_once(tmp_path, monkeypatch) -> None:
+    first, second = tmp_path / "first", tmp_path / "second"
+    for pkgs_dir, dist_name in [
+        (first, "a-1.0-0"),
+        (second, "a-1.0-0"),
+        (second, "b-2.0-0"),
+    ]:
+        info = pkgs_dir / dist_name / "info"
+        info.mkdir(parents=True)
+        record = {"name": dist_name.split("-")[0], "pkgs_dir": pkgs_dir.name}
+        (info / "repodata_record.json").write_text(json.dumps(record))
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(conda_solver.time, "sleep", sleeps.append)
+    records = conda_solver._get_repodata_records(
+        [first, second, tmp_path / "nonexistent"],
+        ["a-1.0-0", "b-2.0-0", "c-3.0-0", "d-4.0-0"],
+    )
+    assert records == {
+        "a-1.0-0": {"name": "a", "pkgs_dir": "first"},
+        "b-2.0-0": {"name": "b", "pkgs_dir": "second"},
+    }
+    # All missing records are retried together, after a single wait.
+    assert sleeps == [conda_solver.REPODATA_RECORD_RETRY_DELAY]
+
+
+def test_get_cached_pkgs_dirs_runs_conda_once(tmp_path, monkeypatch) -> None:
+    calls: list[tuple[str, str]] = []
+
+    def _get_pkgs_dirs(*, conda, platform):
+        calls.append((str(conda), platform))
+        return [tmp_path / platform]
+
+    monkeypatch.setattr(conda_solver, "_get_pkgs_dirs", _get_pkgs_dirs)
+    monkeypatch.setattr(conda_solver, "_PKGS_DIRS_CACHE", {})
+    for _ in range(2):
+        for platform in ["linux-64", "osx-arm64"]:
+            assert conda_solver._get_cached_pkgs_dirs(
+                conda="micromamba", platform=platform
+            ) == [tmp_path / platform]
+    assert calls == [("micromamba", "linux-64"), ("micromamba", "osx-arm64")]
+
+    # A different environment might change the configured package caches.
+    monkeypatch.setenv("CONDA_PKGS_DIRS_TEST", "1")
+    conda_solver._get_cached_pkgs_dirs(conda="micromamba", platform="linux-64")
+    assert len(calls) == 3
@@ -0,0 +1,139 @@
+import os
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pydantic import ValidationError
+
+from conda_lock.lockfile import parse_conda_lock_file
+from conda_lock.lockfile.decode import decode_lockfile_v1, load_yaml
+from conda_lock.lockfile.parsed_cache import load_parsed_lockfile, read_lockfile
+from conda_lock.lockfile.v1.models import Lockfile as LockfileV1
+from conda_lock.lockfile.v2prelim.models import lockfile_v1_to_v2
+
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _load_v1_content(path: Path) -> dict:
+    content = load_yaml(path.read_text())
+    assert content.pop("version") == 1
+    return content
+
+
+@pytest.mark.parametrize(
+    "lockfile_path",
+    [
+        TESTS_DIR / "test-lockfile" / "conda-lock.yml",
+        TESTS_DIR / "test-multiple-categories" / "conda-lock.yml",
+        TESTS_DIR / "test-install-with-pip-deps" / "conda-lock.yml",
+        TESTS_DIR / "test-v2-to-v3-upgrade" / "conda-lock-v3.0.3.yml",
+    ],
+)
+def test_decode_lockfile_v1_matches_validation(lockfile_path: Path):
+    expected = lockfile_v1_to_v2(
+        LockfileV1.model_validate(_load_v1_content(lockfile_path))
+    )
+    with patch.object(LockfileV1, "model_validate") as mock_validate:
+        decoded = decode_lockfile_v1(_load_v1_content(lockfile_path))
+        mock_validate.assert_not_called()
+    assert decoded == expected
+    for ours, theirs in zip(decoded.package, expected.package):
+        assert ours.model_dump() == theirs.model_dump()
+        assert ours.model_fields_set == theirs.model_fields_set
+        assert ours.hash.model_fields_set == theirs.hash.model_fields_set
+
+
+def test_decode_lockfile_v1_falls_back_to_validation():
+    lockfile_path = TESTS_DIR / "test-lockfile" / "conda-lock.yml"
+
+    # Values that pydantic coerces are decoded the same way
+    content = _load_v1_content(lockfile_path)
+    content["package"][0]["optional"] = "false"
+    decoded = decode_lockfile_v1(content)
+    assert decoded.package[0].categories == {"main"}
+
+    content = _load_v1_content(lockfile_path)
+    conda_entry = next(p for p in content["package"] if p["manager"] == "conda")
+    del conda_entry["hash"]["md5"]
+    with pytest.raises(ValidationError, match="MD5"):
+        decode_lockfile_v1(content)
+
+    content = _load_v1_content(lockfile_path)
+    content["package"][0]["extra"] = "field"
+    with pytest.raises(ValidationError):
+        decode_lockfile_v1(content)
+
+    content = _load_v1_content(lockfile_path)
+    content["package"].append(dict(content["package"][0]))
+    with pytest.raises(AssertionError):
+        decode_lockfile_v1(content)
+
+
+def test_parse_conda_lock_file_with_cache(tmp_path: Path):
+    lockfile_path = tmp_path / "conda-lock.yml"
+    lockfile_path.write_bytes(
+        (TESTS_DIR / "test-lockfile" / "conda-lock.yml").read_bytes()
+    )
+    cache_dir = tmp_path / "cache" / "parsed-lockfiles"
+    with patch(
+        "conda_lock.lockfile.parsed_cache._default_cache_dir", return_value=cache_dir
+    ):
+        expected = parse_conda_lock_file(lockfile_path)
+        assert (
+            load_parsed_lockfile(lockfile_path, read_lockfile(lockfile_path)[1]) is None
+        )
+        assert parse_conda_lock_file(lockfile_path, use_cache=True) == expected
+        assert (
+            load_parsed_lockfile(lockfile_path, read_lockfile(lockfile_path)[1])
+            == expected
+        )
+        with patch("conda_lock.lockfile.load_yaml") as mock_load_yaml:
+            assert parse_conda_lock_file(lockfile_path, use_cache=True) == expected
+            mock_load_yaml.assert_not_called()
+
+        # A changed lockfile is parsed again, even if its size and mtime are kept
+        stat = lockfile_path.stat()
+        content = lockfile_path.read_text()
+        lockfile_path.write_text(
+            content.replace("platform: linux-64", "platform: linux-65")
+        )
+        os.utime(lockfile_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert (
+            load_parsed_lockfile(lockfile_path, read_lockfile(lockfile_path)[1]) is None
+        )
+        reparsed = parse_conda_lock_file(lockfile_path, use_cache=True)
+        assert reparsed != expected
+        assert "linux-65" in {p.platform for p in reparsed.package}
+        assert parse_conda_lock_file(lockfile_path, use_cache=True) == reparsed
+
+
+def test_parse_conda_lock_file_for_platforms(tmp_path: Path):
+    lockfile_path = TESTS_DIR / "test-lockfile" / "conda-lock.yml"
+    full = parse_conda_lock_file(lockfile_path)
+    selected = parse_conda_lock_file(lockfile_path, platforms=["linux-64"])
+    assert selected.package == [p for p in full.package if p.platform == "linux-64"]
+    assert selected.metadata == full.metadata
+
+    # Entries of other platforms are not validated
+    content = lockfile_path.read_text()
+    broken_path = tmp_path / "conda-lock.yml"
+    broken_path.write_text(
+        content.replace("platform: osx-64", "platform: osx-64\n  extra: field")
+    )
+    parse_conda_lock_file(broken_path, platforms=["linux-64"])
+    with pytest.raises(ValidationError):
+        parse_conda_lock_file(broken_path, platforms=["osx-64"])
+
+    cache_dir = tmp_path / "cache" / "parsed-lockfiles"
+    with patch(
+        "conda_lock.lockfile.parsed_cache._default_cache_dir", return_value=cache_dir
+    ):
+        for _ in range(2):
+            cached = parse_conda_lock_file(
+                lockfile_path, use_cache=True, platforms=["linux-64"]
+            )
+            assert cached.package == selected.package
+        assert parse_conda_lock_file(lockfile_path, use_cache=True) == full
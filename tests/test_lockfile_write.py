@@ -0,0 +1,81 @@
+import io
+import random
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from conda_lock.lockfile import _dump_lockfile, parse_conda_lock_file
+from conda_lock.lockfile.v2prelim.models import (
+    GitMeta,
+    HashModel,
+    LockedDependency,
+    Lockfile,
+)
+
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _assert_dump_is_identical(content: Lockfile) -> None:
+    f = io.StringIO()
+    _dump_lockfile(content, f)
+    assert f.getvalue() == yaml.dump(content.to_v1().dict_for_output(), sort_keys=False)
+
+
+@pytest.mark.parametrize(
+    "lockfile_path",
+    [
+        TESTS_DIR / "test-lockfile" / "conda-lock.yml",
+        TESTS_DIR / "test-multiple-categories" / "conda-lock.yml",
+        TESTS_DIR / "test-install-with-pip-deps" / "conda-lock.yml",
+    ],
+)
+def test_dump_lockfile_is_identical(lockfile_path: Path):
+    _assert_dump_is_identical(parse_conda_lock_file(lockfile_path))
+
+
+def test_dump_lockfile_with_unusual_values():
+    content = parse_conda_lock_file(TESTS_DIR / "test-lockfile" / "conda-lock.yml")
+    content.metadata.custom_metadata = {"ünïcode": "välue", "yes": "1.0"}
+    content.package.append(
+        LockedDependency(
+            name="odd",
+            version="1.0",
+            manager="pip",
+            platform="linux-64",
+            dependencies={"*": "*", "no": ">=1.0,<2 ; python_version < '3.11'"},
+            url="https://example.com/" + "very-long-path/" * 10 + "odd.whl#sha256=1",
+            hash=HashModel(sha256="null"),
+            categories={"main", "dev", "~extra: 'quoted'"},
+        )
+    )
+    content.package.append(content.package[0].model_copy(update={"categories": set()}))
+    _assert_dump_is_identical(content)
+
+    content.package = []
+    _assert_dump_is_identical(content)
+
+
+def test_dump_lockfile_with_long_non_ascii_values():
+    content = parse_conda_lock_file(TESTS_DIR / "test-lockfile" / "conda-lock.yml")
+    # Long double-quoted scalars are wrapped differently by libyaml
+    content.metadata.git_metadata = GitMeta(
+        git_user_name=(
+            "commit by Łukasz Żółć from the north-east office of some company"
+        ),
+        git_user_email="lukasz@example.com",
+    )
+    _assert_dump_is_identical(content)
+
+    content.package = content.package[:2]
+    rng = random.Random(0)
+    alphabet = "abc déf 漢字\t\"'\\:#-"
+    for _ in range(50):
+        value = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 200)))
+        content.metadata.custom_metadata = {"key": value}
+        content.package[0] = content.package[0].model_copy(
+            update={"dependencies": {"dep": value}}
+        )
+        _assert_dump_is_identical(content)
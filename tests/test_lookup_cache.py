@@ -1,3 +1,4 @@
+import json
 import multiprocessing
 import os
 import platform
@@ -22,7 +23,11 @@ import requests
 from conda_lock.lookup import DEFAULT_MAPPING_URL
 from conda_lock.lookup_cache import (
     cached_download_file,
+    cached_download_path,
+    cached_filename_for_url,
+    cached_path_for_url,
     clear_old_files_from_cache,
+    read_manifest,
     uncached_download_file,
 )
 
@@ -278,6 +283,217 @@ def test_cached_download_file(tmp_path):
         assert mock_get.call_count == 1
 
 
+def test_cached_download_file_stale_while_revalidate(tmp_path):
+    """A stale cached file is returned at once and updated in the background."""
+    url = "https://example.com/test.json"
+    with patch("requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = b"previous content"
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": "previous-etag"}
+        mock_get.return_value = mock_response
+        cached_download_file(url, cache_subdir_name="test_cache", cache_root=tmp_path)
+
+    downloaded = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        downloaded.wait(timeout=10)
+        response = MagicMock()
+        response.content = b"new content"
+        response.status_code = 200
+        response.headers = {"ETag": "new-etag"}
+        return response
+
+    with patch("requests.get", side_effect=slow_get) as mock_get:
+        for _ in range(2):
+            result = cached_download_file(
+                url,
+                cache_subdir_name="test_cache",
+                cache_root=tmp_path,
+                dont_check_if_newer_than_seconds=0,
+                stale_while_revalidate=True,
+            )
+            assert result == b"previous content"
+        downloaded.set()
+        cache = tmp_path / "cache" / "test_cache"
+        key = cached_path_for_url(cache, url).stem
+        for _ in range(100):
+            if read_manifest(cache)[key]["etag"] == "new-etag":
+                break
+            time.sleep(0.1)
+        # Only one background request was made while the first one was running
+        assert mock_get.call_count == 1
+        assert mock_get.call_args[1]["headers"].get("If-None-Match") == "previous-etag"
+
+    with patch("requests.get") as mock_get:
+        result = cached_download_file(
+            url,
+            cache_subdir_name="test_cache",
+            cache_root=tmp_path,
+            stale_while_revalidate=True,
+        )
+        assert result == b"new content"
+        mock_get.assert_not_called()
+
+
+def test_cached_download_path(tmp_path):
+    """A cached file that can be used as is is not read."""
+    url = "https://example.com/test.json"
+    with patch("requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = b"content"
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": "etag"}
+        mock_get.return_value = mock_response
+        path, entry = cached_download_path(
+            url, cache_subdir_name="test_cache", cache_root=tmp_path
+        )
+        assert mock_get.call_count == 1
+    assert path.read_bytes() == b"content"
+    assert entry["etag"] == "etag"
+    assert entry["size"] == len(b"content")
+
+    with (
+        patch("requests.get") as mock_get,
+        patch.object(
+            Path, "read_bytes", autospec=True, side_effect=Path.read_bytes
+        ) as mock_read_bytes,
+    ):
+        assert cached_download_path(
+            url, cache_subdir_name="test_cache", cache_root=tmp_path
+        ) == (path, entry)
+        mock_get.assert_not_called()
+        assert all(call.args[0] != path for call in mock_read_bytes.call_args_list)
+
+    # A cached file that doesn't match its manifest entry is downloaded again
+    path.write_bytes(b"truncated")
+    with patch("requests.get") as mock_get:
+        mock_get.return_value = mock_response
+        assert (
+            cached_download_path(
+                url, cache_subdir_name="test_cache", cache_root=tmp_path
+            )[0].read_bytes()
+            == b"content"
+        )
+        assert mock_get.call_count == 1
+
+
+def test_cached_download_file_clears_cache_periodically(tmp_path):
+    """Old files are not looked for on every access."""
+    url = "https://example.com/test.json"
+    with (
+        patch("requests.get") as mock_get,
+        patch(
+            "conda_lock.lookup_cache.clear_old_files_from_cache",
+            wraps=clear_old_files_from_cache,
+        ) as mock_clear,
+    ):
+        mock_response = MagicMock()
+        mock_response.content = b"content"
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": "etag"}
+        mock_get.return_value = mock_response
+        for _ in range(3):
+            cached_download_file(
+                url, cache_subdir_name="test_cache", cache_root=tmp_path
+            )
+        assert mock_clear.call_count == 1
+
+        # A small maximum age also shortens the interval
+        stamp = tmp_path / "cache" / "test_cache" / ".last-cleared"
+        t = time.time()
+        os.utime(stamp, (t - 20, t - 20))
+        cached_download_file(
+            url, cache_subdir_name="test_cache", cache_root=tmp_path, max_age_seconds=10
+        )
+        assert mock_clear.call_count == 2
+
+
+def test_cached_download_file_layout(tmp_path):
+    """Cached files are sharded by their full key and recorded in the manifest."""
+    cache = tmp_path / "cache" / "test_cache"
+    urls = [f"https://example.com/{i}.json" for i in range(20)]
+    with patch("requests.get") as mock_get:
+        for url in urls:
+            mock_response = MagicMock()
+            mock_response.content = url.encode()
+            mock_response.status_code = 200
+            mock_response.headers = {"ETag": f"etag-{url}"}
+            mock_get.return_value = mock_response
+            cached_download_file(
+                url, cache_subdir_name="test_cache", cache_root=tmp_path
+            )
+
+    manifest = read_manifest(cache)
+    assert len(manifest) == len(urls)
+    for url in urls:
+        path = cached_path_for_url(cache, url)
+        assert path.read_bytes() == url.encode()
+        assert path.parent.name == path.name[:2]
+        assert path.name == cached_filename_for_url(url)
+        entry = manifest[path.stem]
+        assert entry["url"] == url
+        assert entry["size"] == len(url)
+        assert entry["etag"] == f"etag-{url}"
+
+    # A cached file that does not match its manifest entry is downloaded again
+    cached_path_for_url(cache, urls[0]).write_bytes(b"truncated")
+    with patch("requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = b"downloaded again"
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_get.return_value = mock_response
+        result = cached_download_file(
+            urls[0], cache_subdir_name="test_cache", cache_root=tmp_path
+        )
+        assert result == b"downloaded again"
+        assert mock_get.call_args[1]["headers"].get("If-None-Match") is None
+    assert (
+        read_manifest(cache)[cached_path_for_url(cache, urls[0]).stem]["etag"] is None
+    )
+
+
+def test_cached_download_file_clears_old_entries(tmp_path):
+    """Old files are found through the manifest, legacy files by their age."""
+    cache = tmp_path / "cache" / "test_cache"
+    with patch("requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = b"content"
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": "etag"}
+        mock_get.return_value = mock_response
+        for url in ["https://example.com/old.json", "https://example.com/new.json"]:
+            cached_download_file(
+                url, cache_subdir_name="test_cache", cache_root=tmp_path
+            )
+
+    old_path = cached_path_for_url(cache, "https://example.com/old.json")
+    new_path = cached_path_for_url(cache, "https://example.com/new.json")
+    manifest_path = cache / "v2" / "manifest.json"
+    manifest = read_manifest(cache)
+    manifest[old_path.stem]["mtime"] -= 100
+    manifest_path.write_text(json.dumps(manifest))
+    legacy_file = cache / "a5d7.json"
+    legacy_file.touch()
+    t = time.time()
+    os.utime(legacy_file, (t - 100, t - 100))
+    (cache / ".last-cleared").unlink()
+
+    with patch("requests.get") as mock_get:
+        cached_download_file(
+            "https://example.com/new.json",
+            cache_subdir_name="test_cache",
+            cache_root=tmp_path,
+            max_age_seconds=50,
+        )
+        mock_get.assert_not_called()
+    assert not old_path.exists()
+    assert new_path.exists()
+    assert not legacy_file.exists()
+    assert set(read_manifest(cache)) == {new_path.stem}
+
+
 def test_download_mapping_file(tmp_path):
     """Verify that we can download the actual mapping file and that it is cached."""
     url = DEFAULT_MAPPING_URL
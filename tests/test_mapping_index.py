@@ -0,0 +1,107 @@
+import os
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from conda_lock import lookup
+from conda_lock.mapping_index import (
+    MappingIndex,
+    build_mapping_index,
+    load_mapping_index,
+    store_mapping_index,
+)
+
+
+@pytest.fixture
+def isolated_lookup(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(lookup, "user_cache_path", lambda *args, **kwargs: tmp_path)
+    for function in (lookup._get_mapping_index, lookup._get_conda_lookup):
+        function.cache_clear()
+    yield tmp_path / "cache" / "pypi-mapping"
+    for function in (lookup._get_mapping_index, lookup._get_conda_lookup):
+        function.cache_clear()
+
+
+def test_mapping_index_roundtrip(tmp_path: Path):
+    conda_names = {f"pkg-{i}": f"conda-pkg-{i}" for i in range(100)}
+    conda_names["ünïcode"] = "unicode"
+    pypi_names = {value: key for key, value in conda_names.items()}
+    content = build_mapping_index(conda_names, pypi_names, validator="abc")
+    path = tmp_path / "mapping.index"
+    store_mapping_index(path, content)
+
+    index = load_mapping_index(path, validator="abc")
+    assert index is not None
+    for key, value in conda_names.items():
+        assert index.conda_name(key) == value
+        assert index.pypi_name(value) == key
+    assert index.conda_name("missing") is None
+    assert index.pypi_name("") is None
+    assert index.conda_names() == conda_names
+    assert index.pypi_names() == pypi_names
+
+    assert load_mapping_index(path, validator="other") is None
+    assert load_mapping_index(tmp_path / "missing.index", validator="abc") is None
+    path.write_bytes(content[:-1])
+    assert load_mapping_index(path, validator="abc") is None
+
+
+def test_empty_mapping_index():
+    index = MappingIndex(build_mapping_index({}, {}, validator=""))
+    assert index.conda_name("a") is None
+    assert index.pypi_names() == {}
+
+
+def test_mapping_index_is_reused(isolated_lookup: Path, tmp_path: Path):
+    mapping = tmp_path / "mapping.yml"
+    mapping.write_text(
+        "Python_Dateutil:\n  conda_name: emoji\n  pypi_name: Python_Dateutil\n"
+    )
+    url = str(mapping)
+    assert lookup.conda_name_to_pypi_name("emoji", url) == "python-dateutil"
+    assert lookup.pypi_name_to_conda_name("python.dateutil", url) == "emoji"
+    (index_path,) = isolated_lookup.glob("*.index")
+
+    # A second process reads the index instead of parsing the mapping
+    lookup._get_mapping_index.cache_clear()
+    index_path.write_bytes(
+        build_mapping_index(
+            {"python-dateutil": "from-index"},
+            {},
+            validator=MappingIndex.open(index_path).validator,
+        )
+    )
+    with patch.object(
+        Path, "read_bytes", autospec=True, side_effect=Path.read_bytes
+    ) as mock_read_bytes:
+        index = lookup._get_mapping_index(url)
+        assert all(call.args[0] != mapping for call in mock_read_bytes.call_args_list)
+    assert index.conda_name("python-dateutil") == "from-index"
+
+    # The index is rebuilt when the mapping changes
+    lookup._get_mapping_index.cache_clear()
+    stat = mapping.stat()
+    mapping.write_text("other:\n  conda_name: other-conda\n  pypi_name: other\n")
+    os.utime(mapping, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    index = lookup._get_mapping_index(url)
+    assert index.conda_names() == {"other": "other-conda"}
+    assert MappingIndex.open(index_path).conda_names() == {"other": "other-conda"}
+
+
+def test_single_lookups_do_not_load_the_whole_mapping(isolated_lookup: Path):
+    mapping = (
+        Path(__file__).parent / "test-lookup" / "emoji-to-python-dateutil-lookup.yml"
+    )
+    url = str(mapping)
+    assert lookup.conda_name_to_pypi_name("emoji", url) == "python-dateutil"
+    assert lookup.conda_name_to_pypi_name("Other_Name", url) == "other-name"
+    assert lookup.pypi_name_to_conda_name("python-dateutil", url) == "emoji"
+    assert lookup._get_conda_lookup.cache_info().currsize == 0
+
+    assert lookup.conda_names_to_pypi_names(["emoji", "Other_Name"], url) == {
+        "emoji": "python-dateutil",
+        "Other_Name": "other-name",
+    }
+    assert lookup._get_conda_lookup.cache_info().currsize == 1
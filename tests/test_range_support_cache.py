@@ -0,0 +1,52 @@
+import json
+import time
+
+from pathlib import Path
+
+from conda_lock import pypi_solver
+from conda_lock.models.pip_repository import PipRepository
+from conda_lock.range_support_cache import (
+    RANGE_SUPPORT_MAX_AGE_SECONDS,
+    PersistentRangeSupport,
+)
+
+
+def test_range_support_is_shared_between_instances(tmp_path: Path) -> None:
+    path = tmp_path / "range-support.json"
+    first = PersistentRangeSupport(path)
+    assert first.get("example.com", True)
+    first.setdefault("example.com", False)
+    first["files.pythonhosted.org"] = True
+    # setdefault does not override a known verdict
+    first.setdefault("files.pythonhosted.org", False)
+
+    second = PersistentRangeSupport(path)
+    assert second == {"example.com": False, "files.pythonhosted.org": True}
+
+
+def test_range_support_forgets_old_and_invalid_entries(tmp_path: Path) -> None:
+    path = tmp_path / "range-support.json"
+    old = time.time() - RANGE_SUPPORT_MAX_AGE_SECONDS - 1
+    path.write_text(
+        json.dumps(
+            {
+                "old.example.com": [False, old],
+                "new.example.com": [False, time.time()],
+                "invalid.example.com": "yes",
+            }
+        )
+    )
+    assert PersistentRangeSupport(path) == {"new.example.com": False}
+
+    path.write_text("not json")
+    assert PersistentRangeSupport(path) == {}
+
+
+def test_prepare_repositories_pool_uses_persistent_range_support() -> None:
+    pool = pypi_solver._prepare_repositories_pool(
+        allow_pypi_requests=True,
+        pip_repositories=[PipRepository.from_string("https://example.com/simple")],
+    )
+    assert len(pool.repositories) == 2
+    for repository in pool.repositories:
+        assert isinstance(repository._supports_range_requests, PersistentRangeSupport)
@@ -0,0 +1,126 @@
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+from conda_lock.lockfile.v2prelim.models import HashModel, LockedDependency
+from conda_lock.models.channel import Channel
+from conda_lock.rattler_solver import RattlerSession, solve_specs_in_process
+from conda_lock.virtual_package import default_virtual_package_repodata
+
+
+pytest.importorskip("rattler")
+
+
+def _repodata_entry(name: str, version: str, depends: list[str]) -> dict:
+    return {
+        "name": name,
+        "version": version,
+        "build": "0",
+        "build_number": 0,
+        "depends": depends,
+        "subdir": "linux-64",
+        "md5": "0" * 32,
+        "sha256": "1" * 64,
+    }
+
+
+@pytest.fixture
+def local_channel(tmp_path: Path) -> Channel:
+    packages = {
+        "foo-1.0-0.tar.bz2": _repodata_entry("foo", "1.0", ["bar", "__glibc >=2.17"]),
+        "foo-2.0-0.tar.bz2": _repodata_entry("foo", "2.0", ["bar", "__glibc >=2.17"]),
+        "bar-1.0-0.tar.bz2": _repodata_entry("bar", "1.0", []),
+        "bar-2.0-0.tar.bz2": _repodata_entry("bar", "2.0", []),
+        "baz-1.0-0.tar.bz2": _repodata_entry("baz", "1.0", ["__glibc >=99"]),
+    }
+    for subdir in ("linux-64", "noarch"):
+        (tmp_path / subdir).mkdir()
+        repodata = {
+            "info": {"subdir": subdir},
+            "packages": packages if subdir == "linux-64" else {},
+            "packages.conda": {},
+        }
+        (tmp_path / subdir / "repodata.json").write_text(json.dumps(repodata))
+    return Channel.from_string(tmp_path.as_uri())
+
+
+def _locked(channel: Channel, name: str, version: str) -> LockedDependency:
+    return LockedDependency(
+        name=name,
+        version=version,
+        manager="conda",
+        platform="linux-64",
+        url=f"{channel.url}/linux-64/{name}-{version}-0.tar.bz2",
+        hash=HashModel(md5="0" * 32, sha256="1" * 64),
+    )
+
+
+def test_solve_specs_in_process(local_channel: Channel):
+    channels = [local_channel, default_virtual_package_repodata().channel]
+    dry_run_install = solve_specs_in_process(
+        channels=channels, specs=["foo"], platform="linux-64"
+    )
+    fetch = {a["name"]: a for a in dry_run_install["actions"]["FETCH"]}
+    assert {name: a["version"] for name, a in fetch.items()} == {
+        "foo": "2.0",
+        "bar": "2.0",
+        "__glibc": "2.28",
+    }
+    assert fetch["foo"]["url"] == f"{local_channel.url}/linux-64/foo-2.0-0.tar.bz2"
+    assert fetch["foo"]["depends"] == ["bar", "__glibc >=2.17"]
+    assert fetch["foo"]["md5"] == "0" * 32
+    assert {a["name"] for a in dry_run_install["actions"]["LINK"]} == set(fetch)
+
+
+def test_update_specs_in_process(local_channel: Channel):
+    channels = [local_channel, default_virtual_package_repodata().channel]
+    locked = {
+        "foo": _locked(local_channel, "foo", "1.0"),
+        "bar": _locked(local_channel, "bar", "1.0"),
+    }
+    dry_run_install = solve_specs_in_process(
+        channels=channels,
+        specs=["foo"],
+        platform="linux-64",
+        locked=locked,
+        update=["foo"],
+    )
+    versions = {a["name"]: a["version"] for a in dry_run_install["actions"]["FETCH"]}
+    assert versions["foo"] == "2.0"
+    assert versions["bar"] == "1.0"
+
+
+def test_solve_specs_in_process_unsatisfiable(local_channel: Channel):
+    channels = [local_channel, default_virtual_package_repodata().channel]
+    with pytest.raises(RuntimeError, match="Could not lock the environment"):
+        solve_specs_in_process(channels=channels, specs=["baz"], platform="linux-64")
+
+
+def test_solve_specs_in_process_reuses_session(local_channel: Channel):
+    channels = [local_channel, default_virtual_package_repodata().channel]
+    session = RattlerSession()
+
+    def solve() -> dict[str, str]:
+        dry_run_install = solve_specs_in_process(
+            channels=channels, specs=["foo"], platform="linux-64", session=session
+        )
+        return {a["name"]: a["version"] for a in dry_run_install["actions"]["FETCH"]}
+
+    assert solve()["foo"] == "2.0"
+
+    # A newer release is only seen once the repodata is loaded again.
+    repodata_path = Path(urlsplit(local_channel.url).path) / "linux-64/repodata.json"
+    repodata = json.loads(repodata_path.read_text())
+    repodata["packages"]["foo-3.0-0.tar.bz2"] = _repodata_entry("foo", "3.0", ["bar"])
+    repodata_path.write_text(json.dumps(repodata))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda _: solve(), range(2)))
+    assert [result["foo"] for result in results] == ["2.0", "2.0"]
+
+    session.close()
+    assert solve()["foo"] == "3.0"
@@ -0,0 +1,138 @@
+import os
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from conda_lock.conda_lock import _solve_for_arch_with_cache
+from conda_lock.lockfile.v2prelim.models import HashModel, LockedDependency
+from conda_lock.models.channel import Channel
+from conda_lock.models.lock_spec import LockSpecification, VersionedDependency
+from conda_lock.solve_cache import (
+    evict_solve_cache,
+    load_cached_solve,
+    solve_cache_key,
+    store_solve,
+)
+
+
+def _make_dep(name: str) -> LockedDependency:
+    return LockedDependency(
+        name=name,
+        version="1.0",
+        manager="conda",
+        platform="linux-64",
+        dependencies={"python": ">=3.10"},
+        url=f"https://conda.anaconda.org/conda-forge/linux-64/{name}-1.0-0.conda",
+        hash=HashModel(md5="0" * 32, sha256="1" * 64),
+        categories={"main", "dev"},
+    )
+
+
+def _mock_head(etag: str | None) -> MagicMock:
+    response = MagicMock()
+    response.headers = {} if etag is None else {"ETag": etag}
+    return response
+
+
+def test_store_and_load_solve(tmp_path: Path):
+    deps = [_make_dep("python"), _make_dep("zlib")]
+    assert load_cached_solve("abc", cache_dir=tmp_path) is None
+    store_solve("abc", deps, cache_dir=tmp_path)
+    assert load_cached_solve("abc", cache_dir=tmp_path) == deps
+
+
+def test_load_corrupt_solve(tmp_path: Path):
+    (tmp_path / "abc.json").write_text("[{")
+    assert load_cached_solve("abc", cache_dir=tmp_path) is None
+
+
+def test_store_solve_ignores_errors(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("not a directory")
+    store_solve("abc", [_make_dep("python")], cache_dir=cache_dir)
+    assert load_cached_solve("abc", cache_dir=cache_dir) is None
+
+
+def test_evict_solve_cache(tmp_path: Path):
+    for i, key in enumerate(["old", "middle", "new"]):
+        path = tmp_path / f"{key}.json"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    evict_solve_cache(tmp_path, max_size_bytes=250)
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["middle", "new"]
+
+
+def test_solve_cache_key_tracks_repodata_state():
+    channels = [Channel.from_string("conda-forge")]
+
+    def key_for_etag(etag: str | None) -> str | None:
+        with patch("requests.head", return_value=_mock_head(etag)):
+            return solve_cache_key(
+                content_hash="hash", channels=channels, platform="linux-64"
+            )
+
+    with patch("requests.head", return_value=_mock_head("a")) as mock_head:
+        key = solve_cache_key(
+            content_hash="hash", channels=channels, platform="linux-64"
+        )
+    assert [call.args[0] for call in mock_head.call_args_list] == [
+        "https://conda.anaconda.org/conda-forge/linux-64/repodata.json",
+        "https://conda.anaconda.org/conda-forge/noarch/repodata.json",
+    ]
+    assert key is not None
+    assert key == key_for_etag("a")
+    assert key != key_for_etag("b")
+    assert key_for_etag(None) is None
+
+
+def test_solve_cache_key_unavailable_channel():
+    with patch("requests.head", side_effect=requests.ConnectionError):
+        key = solve_cache_key(
+            content_hash="hash",
+            channels=[Channel.from_string("conda-forge")],
+            platform="linux-64",
+        )
+    assert key is None
+    assert (
+        solve_cache_key(
+            content_hash="hash",
+            channels=[Channel.from_string("defaults")],
+            platform="linux-64",
+        )
+        is None
+    )
+
+
+def test_solve_cache_skips_pip_dependencies():
+    spec = LockSpecification(
+        dependencies={
+            "linux-64": [
+                VersionedDependency(name="python", version="3.12"),
+                VersionedDependency(name="requests", version="*", manager="pip"),
+            ]
+        },
+        channels=[Channel.from_string("conda-forge")],
+        sources=[],
+    )
+    deps = [_make_dep("python")]
+    with (
+        patch("conda_lock.conda_lock.solve_cache_key") as mock_key,
+        patch("conda_lock.conda_lock.store_solve") as mock_store,
+    ):
+        solution = _solve_for_arch_with_cache(
+            MagicMock(return_value=deps),
+            platform="linux-64",
+            conda="conda",
+            spec=spec,
+            content_hashes={"linux-64": "hash"},
+            update_spec=None,
+            strip_auth=False,
+            mapping_url="",
+            solver_backend="subprocess",
+            incremental_pip=False,
+        )
+    assert solution == deps
+    mock_key.assert_not_called()
+    mock_store.assert_not_called()